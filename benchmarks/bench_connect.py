@@ -0,0 +1,96 @@
+"""
+Time-to-first-transcript: cold connect vs. pre-warmed Deepgram session.
+
+Usage (from the repo root, needs api_key in config.json and a speech WAV
+recorded as 16 kHz mono int16):
+    python -m benchmarks.bench_connect speech.wav --runs 5
+
+The clock starts when the "VAD" fires, i.e. right before a session is
+requested, and stops at the first transcript callback.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+import wave
+
+from utils.config import ConfigManager
+from engine.connection_pool import DeepgramConnectionPool
+from engine.transcriber import DeepgramTranscriber
+
+CHUNK = 1024
+
+
+def read_chunks(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getframerate() != 16000 or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError("Expected a 16 kHz mono 16-bit WAV file")
+        frames = wav.readframes(wav.getnframes())
+    step = CHUNK * 2
+    return [frames[i:i + step] for i in range(0, len(frames), step)]
+
+
+def measure(get_transcriber, chunks, timeout=10.0):
+    first = threading.Event()
+    result = {}
+
+    def on_transcript(text, is_final):
+        if not first.is_set():
+            result["latency"] = time.perf_counter() - start
+            first.set()
+
+    start = time.perf_counter()
+    transcriber = get_transcriber(on_transcript)
+    if not transcriber.connection_ready.wait(timeout=5):
+        transcriber.stop()
+        return None
+
+    # Stream at real-time pace, like the microphone would
+    for chunk in chunks:
+        if first.is_set():
+            break
+        transcriber.send_audio(chunk)
+        time.sleep(CHUNK / 16000)
+    first.wait(timeout=timeout)
+    transcriber.stop()
+    return result.get("latency")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("wav")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    config = ConfigManager(os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json"))
+    chunks = read_chunks(args.wav)
+
+    def cold(callback):
+        transcriber = DeepgramTranscriber(config.get("api_key"), config, callback)
+        transcriber.start()
+        return transcriber
+
+    pool = DeepgramConnectionPool(config)
+    pool.start()
+
+    results = {"cold": [], "warm": []}
+    for _ in range(args.runs):
+        results["cold"].append(measure(cold, chunks))
+        # Give the pool time to open its replacement spare
+        time.sleep(3)
+        results["warm"].append(measure(pool.acquire, chunks))
+    pool.stop()
+
+    for name, latencies in results.items():
+        ok = [l * 1000 for l in latencies if l is not None]
+        if not ok:
+            print(f"{name}: no transcripts received")
+            continue
+        print(f"{name}: median {statistics.median(ok):.0f} ms, "
+              f"min {min(ok):.0f} ms, max {max(ok):.0f} ms, "
+              f"failures {len(latencies) - len(ok)}")
+
+
+if __name__ == "__main__":
+    main()
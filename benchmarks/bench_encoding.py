@@ -0,0 +1,125 @@
+"""
+Deepgram stream encodings: encode CPU vs. bytes on the wire vs. latency.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_encoding speech.wav
+    python -m benchmarks.bench_encoding --synthetic 20 --uplink-kbps 200
+    python -m benchmarks.bench_encoding speech.wav --encodings linear16 mulaw --encode-only
+
+Part one encodes the audio in capture-sized chunks and reports CPU time
+and bitrate per encoding. Part two streams it at real time through
+DeepgramTranscriber to the local mock server over an uplink limited to
+--uplink-kbps and reports how long each final took after the audio it
+covers was sent. ogg-opus needs opuslib and libopus and is skipped
+without them.
+"""
+import argparse
+import bisect
+import threading
+import time
+
+from benchmarks.bench_filters import DictConfig
+from benchmarks.bench_replay import read_pcm
+from benchmarks.bench_vad import synthetic_chunks
+from benchmarks.mock_servers import MockDeepgramServer, NetworkProfile
+from engine.encoders import ENCODERS, create_encoder
+from utils.metrics import Histogram
+
+SAMPLE_RATE = 16000
+
+
+def encode_cost(name, pcm, chunk):
+    encoder = create_encoder(name)
+    step = chunk * 2
+    out = 0
+    start = time.process_time()
+    for i in range(0, len(pcm), step):
+        out += len(encoder.encode(pcm[i:i + step]))
+    out += len(encoder.flush())
+    cpu_s = time.process_time() - start
+    audio_s = len(pcm) / 2 / SAMPLE_RATE
+    return cpu_s * 1000 / audio_s, out * 8 / audio_s / 1000
+
+
+def stream_latency(name, pcm, chunk, uplink_kbps):
+    from engine.transcriber import DeepgramTranscriber
+
+    server = MockDeepgramServer(NetworkProfile(uplink_kbps=uplink_kbps)).start()
+    config = DictConfig({
+        "deepgram_url": server.url,
+        "deepgram_encoding": name,
+        "language": "en",
+        "model": "nova-3",
+    })
+    sent_ends, sent_times = [], []
+    latencies = Histogram()
+    lock = threading.Lock()
+
+    def on_transcript(text, is_final):
+        if not is_final or transcriber.final_end is None:
+            return
+        with lock:
+            i = bisect.bisect_left(sent_ends, transcriber.final_end - 1e-6)
+            if i < len(sent_times):
+                latencies.observe((time.perf_counter() - sent_times[i]) * 1000)
+
+    transcriber = DeepgramTranscriber("mock", config, on_transcript)
+    transcriber.start()
+    if not transcriber.connection_ready.wait(timeout=5):
+        transcriber.stop()
+        server.stop()
+        raise RuntimeError("mock server did not accept the connection")
+
+    step = chunk * 2
+    interval = chunk / SAMPLE_RATE
+    next_at = time.perf_counter()
+    for i in range(0, len(pcm), step):
+        with lock:
+            sent_ends.append(min(i + step, len(pcm)) / 2 / SAMPLE_RATE)
+            sent_times.append(time.perf_counter())
+        transcriber.send_audio(pcm[i:i + step])
+        next_at += interval
+        time.sleep(max(0, next_at - time.perf_counter()))
+    transcriber.finish()
+    server.stop()
+    return latencies.percentiles(), latencies.count, server.bytes_received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("wav", nargs="?")
+    parser.add_argument("--synthetic", type=float, default=20, help="seconds of synthetic audio when no WAV is given")
+    parser.add_argument("--encodings", nargs="+", default=list(ENCODERS))
+    parser.add_argument("--chunk", type=int, default=512)
+    parser.add_argument("--uplink-kbps", type=float, default=0, help="emulated uplink speed, 0 = unlimited")
+    parser.add_argument("--encode-only", action="store_true")
+    args = parser.parse_args()
+
+    if args.wav:
+        pcm = read_pcm(args.wav)
+    else:
+        pcm = b"".join(synthetic_chunks(int(args.synthetic * SAMPLE_RATE / 4096)))
+
+    usable = []
+    print("encoding      CPU ms/audio s   kbit/s")
+    for name in args.encodings:
+        try:
+            cpu_ms, kbps = encode_cost(name, pcm, args.chunk)
+        except RuntimeError as e:
+            print(f"{name:<13} skipped: {e}")
+            continue
+        usable.append(name)
+        print(f"{name:<13} {cpu_ms:>14.2f} {kbps:>8.1f}")
+    if args.encode_only:
+        return
+
+    link = f"{args.uplink_kbps:g} kbit/s uplink" if args.uplink_kbps else "unlimited uplink"
+    print(f"\nsent-to-final latency, {link}")
+    for name in usable:
+        p, count, wire_bytes = stream_latency(name, pcm, args.chunk, args.uplink_kbps)
+        print(f"{name:<13} p50 {p[0.5]:7.1f}  p95 {p[0.95]:7.1f}  p99 {p[0.99]:7.1f} ms  "
+              f"({count} finals, {wire_bytes / 1024:.0f} KiB on the wire)")
+
+
+if __name__ == "__main__":
+    main()
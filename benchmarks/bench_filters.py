@@ -0,0 +1,78 @@
+"""
+Per-segment cost of TextProcessor as the exclusion/command lists grow.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_filters
+"""
+import random
+import time
+
+from utils.filters import TextProcessor
+
+SEGMENTS = [
+    "привет запятая как дела",
+    "Tell me more about this.",
+    "Спасибо за просмотр!",
+    "новая строка купить молоко точка",
+    "ma räägin eesti keeles",
+]
+
+
+class DictConfig:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get(self, key, default=None):
+        return self.settings.get(key, default)
+
+    def subscribe(self, callback, keys=None):
+        pass
+
+
+def baseline(config, text):
+    """The original linear implementation, for comparison."""
+    text_lower = text.lower().strip().rstrip(".")
+    if text_lower in [e.lower() for e in config.get("exclusions")]:
+        return None
+    commands = config.get("commands")
+    if text_lower in commands:
+        return commands[text_lower]
+    return text
+
+
+def random_phrase(rng):
+    alphabet = "абвгдежзийклмнопрстуфхцчшщыэюя"
+    return " ".join("".join(rng.choice(alphabet) for _ in range(rng.randint(3, 9)))
+                    for _ in range(rng.randint(1, 4)))
+
+
+def time_per_segment(fn, rounds=200):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for segment in SEGMENTS:
+            fn(segment)
+    return (time.perf_counter() - start) / (rounds * len(SEGMENTS)) * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'entries':>8} {'baseline us':>12} {'compiled us':>12} {'compile ms':>11}")
+    for size in (10, 100, 1000, 5000):
+        exclusions = ["спасибо за просмотр"] + [random_phrase(rng) for _ in range(size)]
+        commands = {"запятая": ",", "точка": ".", "новая строка": "\n"}
+        commands.update({random_phrase(rng): "x" for _ in range(size)})
+        config = DictConfig({"exclusions": exclusions, "commands": commands})
+
+        start = time.perf_counter()
+        processor = TextProcessor(config)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        # Keep the hallucination log line out of the timing
+        processor.is_excluded(SEGMENTS[0])
+        compiled = time_per_segment(lambda s: processor.is_excluded(s) or processor.apply_commands(s))
+        old = time_per_segment(lambda s: baseline(config, s), rounds=20)
+        print(f"{size:>8} {old:>12.1f} {compiled:>12.1f} {compile_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Local (in-process faster-whisper) engine: real-time factor and latency.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_local speech.wav
+    python -m benchmarks.bench_local speech.wav --models tiny base --threads 4
+    python -m benchmarks.bench_local speech.wav --step-ms 300 --window-s 10
+
+For each model the audio is streamed at real time through
+LocalWhisperTranscriber. Reported are the model load time (first load,
+then the cached one), the real-time factor (decode time / audio time per
+window pass), and how long each interim and final arrived after the audio
+it covers was sent. An RTF well below 1 is needed to keep up; the window
+is re-decoded every --step-ms, so the CPU share is about RTF * window /
+step. Needs faster-whisper; the model is downloaded on first use.
+"""
+import argparse
+import bisect
+import threading
+import time
+
+from benchmarks.bench_filters import DictConfig
+from benchmarks.bench_replay import read_pcm
+from benchmarks.bench_vad import synthetic_chunks
+from engine.local_transcriber import LocalWhisperTranscriber, load_model
+from utils.metrics import Histogram, metrics
+
+SAMPLE_RATE = 16000
+
+
+def run(model, pcm, args):
+    config = DictConfig({
+        "language": args.language,
+        "local_model": model,
+        "local_compute_type": args.compute_type,
+        "local_cpu_threads": args.threads,
+        "local_step_ms": args.step_ms,
+        "local_window_s": args.window_s,
+    })
+    start = time.perf_counter()
+    LocalWhisperTranscriber.preload(config)
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    load_model(model, args.compute_type, args.threads)
+    cached_ms = (time.perf_counter() - start) * 1000
+
+    sent_ends, sent_times = [], []
+    interims, finals = Histogram(), Histogram()
+    lock = threading.Lock()
+
+    def on_transcript(text, is_final):
+        now = time.perf_counter()
+        with lock:
+            if is_final:
+                # A final covers the audio up to final_end
+                i = bisect.bisect_left(sent_ends, transcriber.final_end - 1e-6)
+                if i < len(sent_times):
+                    finals.observe((now - sent_times[i]) * 1000)
+            elif sent_times:
+                # An interim covers everything sent before the decode began
+                interims.observe((now - sent_times[-1]) * 1000)
+
+    metrics.reset()
+    transcriber = LocalWhisperTranscriber.from_config(config, on_transcript)
+    transcriber.start()
+    if not transcriber.connection_ready.wait(timeout=60):
+        transcriber.stop()
+        raise RuntimeError("local model did not load")
+
+    step = args.chunk * 2
+    interval = args.chunk / SAMPLE_RATE
+    next_at = time.perf_counter()
+    for i in range(0, len(pcm), step):
+        with lock:
+            sent_ends.append(min(i + step, len(pcm)) / 2 / SAMPLE_RATE)
+            sent_times.append(time.perf_counter())
+        transcriber.send_audio(pcm[i:i + step])
+        next_at += interval
+        time.sleep(max(0, next_at - time.perf_counter()))
+    transcriber.finish(timeout=60)
+
+    histograms = metrics.snapshot()["histograms"]
+    return load_s, cached_ms, histograms.get("local_rtf", {}), histograms.get("local_decode_ms", {}), interims, finals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("wav", nargs="?")
+    parser.add_argument("--synthetic", type=float, default=20, help="seconds of synthetic audio when no WAV is given")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base"])
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--threads", type=int, default=0, help="CTranslate2 CPU threads, 0 = default")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--step-ms", type=int, default=500)
+    parser.add_argument("--window-s", type=float, default=15.0)
+    parser.add_argument("--chunk", type=int, default=512)
+    args = parser.parse_args()
+
+    if args.wav:
+        pcm = read_pcm(args.wav)
+    else:
+        pcm = b"".join(synthetic_chunks(int(args.synthetic * SAMPLE_RATE / 4096)))
+
+    print(f"{len(pcm) / 2 / SAMPLE_RATE:.1f} s of audio, {args.compute_type}, step {args.step_ms} ms, "
+          f"window {args.window_s:g} s")
+    for model in args.models:
+        load_s, cached_ms, rtf, decode, interims, finals = run(model, pcm, args)
+        print(f"\n{model}: load {load_s:.2f} s (cached {cached_ms:.2f} ms)")
+        if rtf:
+            print(f"  RTF        p50 {rtf['p50']:7.3f}  p95 {rtf['p95']:7.3f}  ({rtf['count']} passes)")
+            print(f"  decode     p50 {decode['p50']:7.1f}  p95 {decode['p95']:7.1f} ms")
+        for name, histogram in (("interim", interims), ("final", finals)):
+            if histogram.count:
+                p = histogram.percentiles()
+                print(f"  {name:<10} p50 {p[0.5]:7.1f}  p95 {p[0.95]:7.1f}  p99 {p[0.99]:7.1f} ms after sent "
+                      f"({histogram.count})")
+            else:
+                print(f"  {name:<10} none")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Offline end-to-end replay: recorded PCM -> RuttuApp -> local mock server.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_replay speech.wav
+    python -m benchmarks.bench_replay speech.wav --engine whisper_live --speed 4
+    python -m benchmarks.bench_replay speech.wav --delay-ms 80 --jitter-ms 40 --disconnect-after 5
+    python -m benchmarks.bench_replay --synthetic 30 --json results.json
+
+Chunks are fed to RuttuApp.audio_callback at --speed times real time, so
+the pipeline, VAD, ring buffer, transcriber and (fake) typist all run as in
+the app, only the network peer is a local stand-in from mock_servers. The
+report covers the latency histograms from utils.metrics, CPU time per
+second of audio and peak RSS. The WAV must be 16 kHz mono 16-bit.
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+import wave
+
+from benchmarks.bench_vad import max_rss_mb, synthetic_chunks
+from benchmarks.mock_servers import MockDeepgramServer, MockWhisperLiveServer, NetworkProfile
+from engine.typist import FakeClipboard, FakeKeyboard, MacTypist, QueuedTypist
+from utils.metrics import metrics
+
+SAMPLE_RATE = 16000
+
+
+def read_pcm(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getframerate() != SAMPLE_RATE or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError("Expected a 16 kHz mono 16-bit WAV file")
+        return wav.readframes(wav.getnframes())
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def write_config(path, engine, server, chunk, prewarm):
+    settings = {
+        "api_key": "mock",
+        "transcription_engine": engine,
+        "deepgram_url": server.url if engine == "deepgram" else "",
+        "deepgram_prewarm": prewarm,
+        "whisper_host": server.host,
+        "whisper_port": server.port,
+        "audio_chunk": chunk,
+        "log_level": "WARNING",
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(settings, f)
+
+
+def replay(app, pcm, chunk, speed, tail_s):
+    """Feeds pcm to the app in capture-sized chunks at speed x real time."""
+    step = chunk * 2
+    interval = chunk / SAMPLE_RATE / speed if speed else 0
+    app.start_monitoring(capture=False)
+    next_at = time.perf_counter()
+    for i in range(0, len(pcm), step):
+        app.audio_callback(pcm[i:i + step], False)
+        if interval:
+            next_at += interval
+            time.sleep(max(0, next_at - time.perf_counter()))
+    # Trailing silence lets the VAD close the utterance and finals arrive
+    silence = bytes(step)
+    for _ in range(int(tail_s * SAMPLE_RATE / chunk)):
+        app.audio_callback(silence, False)
+        if interval:
+            time.sleep(interval)
+    # Flush outstanding finals instead of waiting for the idle timeout
+    transcriber = app.transcriber
+    if transcriber:
+        transcriber.finish()
+    app.stop_monitoring()
+    app.typist.wait_idle()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("wav", nargs="?")
+    parser.add_argument("--synthetic", type=float, default=0, help="seconds of synthetic audio instead of a WAV")
+    parser.add_argument("--engine", choices=("deepgram", "whisper_live"), default="deepgram")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay pace, 0 = as fast as possible")
+    parser.add_argument("--chunk", type=int, default=1024, help="frames per audio callback")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--tail", type=float, default=2.0, help="seconds of silence appended to each run")
+    parser.add_argument("--no-prewarm", action="store_true")
+    parser.add_argument("--delay-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--disconnect-after", type=float, default=0, help="drop each connection after N seconds")
+    parser.add_argument("--uplink-kbps", type=float, default=0, help="emulated uplink speed, 0 = unlimited")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this path")
+    args = parser.parse_args()
+
+    if args.wav:
+        pcm = read_pcm(args.wav)
+    elif args.synthetic:
+        pcm = b"".join(synthetic_chunks(int(args.synthetic * SAMPLE_RATE / 4096), seed=args.seed))
+    else:
+        parser.error("give a WAV file or --synthetic SECONDS")
+    audio_s = len(pcm) / 2 / SAMPLE_RATE
+
+    profile = NetworkProfile(args.delay_ms, args.jitter_ms, args.disconnect_after, args.seed, args.uplink_kbps)
+    server_cls = MockDeepgramServer if args.engine == "deepgram" else MockWhisperLiveServer
+    server = server_cls(profile).start()
+
+    # Imported late: main pulls in the whole app
+    from main import RuttuApp
+
+    keyboard = FakeKeyboard(FakeClipboard())
+    typist = QueuedTypist(MacTypist(keyboard=keyboard, clipboard=keyboard.clipboard))
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "config.json")
+        write_config(config_path, args.engine, server, args.chunk, not args.no_prewarm)
+        app = RuttuApp(config_path=config_path, typist=typist)
+        app.ensure_vad()
+        app.ready.set()
+
+        metrics.reset()
+        cpu_start = cpu_seconds()
+        wall_start = time.perf_counter()
+        for _ in range(args.runs):
+            replay(app, pcm, args.chunk, args.speed, args.tail)
+        wall_s = time.perf_counter() - wall_start
+        cpu_s = cpu_seconds() - cpu_start
+        typist.stop()
+    server.stop()
+
+    total_audio_s = audio_s * args.runs
+    report = {
+        "engine": args.engine,
+        "audio_s": round(total_audio_s, 2),
+        "wall_s": round(wall_s, 2),
+        "cpu_ms_per_audio_s": round(cpu_s * 1000 / total_audio_s, 2),
+        "max_rss_mb": round(max_rss_mb(), 1),
+        "pipeline": app.pipeline.stats(),
+        "server": {
+            "connections": server.connections,
+            "disconnects": server.disconnects,
+            "bytes_received": server.bytes_received,
+        },
+        "typed_chars": len(keyboard.text),
+        **metrics.snapshot(),
+    }
+
+    print(f"{args.engine}: {total_audio_s:.1f} s audio in {wall_s:.1f} s, "
+          f"{report['cpu_ms_per_audio_s']:.1f} ms CPU per audio second, {report['max_rss_mb']:.0f} MB max RSS")
+    print(f"  server: {report['server']}, typed {report['typed_chars']} chars")
+    for name, h in sorted(report["histograms"].items()):
+        print(f"  {name:<28} n={h['count']:<5} p50 {h['p50']:8.2f}  p95 {h['p95']:8.2f}  p99 {h['p99']:8.2f} ms")
+    for name, value in sorted(report["counters"].items()):
+        print(f"  {name:<28} {value:g}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cold-start benchmark: import cost, time-to-tray-icon and time-to-ready.
+
+Usage (from the repo root, on a machine with a desktop session):
+    python -m benchmarks.bench_startup --runs 3
+
+Import cost comes from `python -X importtime -c "import main"`. The two
+startup times come from running `main.py --startup-benchmark`, which exits
+as soon as background initialization has finished.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAY_RE = re.compile(r"Tray icon shown (\d+) ms")
+READY_RE = re.compile(r"Ready for dictation (\d+) ms")
+
+
+def import_profile(top=10):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(f"[WARNING] import main failed, profile is partial:\n{result.stderr.splitlines()[-1]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Only top-level imports; nested ones are indented further
+        if not name[1:].startswith(" "):
+            rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    total_ms = sum(us for us, _ in rows) / 1000
+    return total_ms, rows[:top]
+
+
+def startup_run(timeout):
+    result = subprocess.run(
+        [sys.executable, "main.py", "--startup-benchmark"],
+        cwd=ROOT, capture_output=True, text=True, timeout=timeout
+    )
+    tray = TRAY_RE.search(result.stdout)
+    ready = READY_RE.search(result.stdout)
+    if not tray or not ready:
+        raise RuntimeError(f"main.py did not report startup times:\n{result.stdout}\n{result.stderr}")
+    return int(tray.group(1)), int(ready.group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--imports-only", action="store_true")
+    args = parser.parse_args()
+
+    total_ms, rows = import_profile()
+    print(f"import main: {total_ms:.0f} ms total")
+    for us, name in rows:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+    if args.imports_only:
+        return
+
+    trays, readies = [], []
+    for _ in range(args.runs):
+        tray_ms, ready_ms = startup_run(args.timeout)
+        trays.append(tray_ms)
+        readies.append(ready_ms)
+    print(f"time to tray icon:  median {statistics.median(trays)} ms  ({trays})")
+    print(f"time to ready:      median {statistics.median(readies)} ms  ({readies})")
+
+
+if __name__ == "__main__":
+    main()
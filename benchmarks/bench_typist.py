@@ -0,0 +1,58 @@
+"""
+Text injection throughput with the in-memory keyboard (runs on Linux).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_typist
+    python -m benchmarks.bench_typist --event-delay 0.0005
+
+event_delay emulates the per key event cost of the OS; "blocked" is how
+long the transcript callback would be held up by each strategy.
+"""
+import argparse
+import time
+
+from engine.typist import FakeClipboard, FakeKeyboard, MacTypist, QueuedTypist
+
+SENTENCE = "Tell me more about this, and then we can talk about the plan. "
+
+
+def run(label, paste_threshold, queued, segments, event_delay):
+    clipboard = FakeClipboard("previous clipboard")
+    keyboard = FakeKeyboard(clipboard, event_delay=event_delay)
+    typist = MacTypist(keyboard, clipboard, paste_threshold=paste_threshold, restore_delay=0.0)
+    if queued:
+        typist = QueuedTypist(typist)
+
+    start = time.perf_counter()
+    for segment in segments:
+        typist.type_text(segment)
+    blocked = time.perf_counter() - start
+    if queued:
+        typist.wait_idle()
+        typist.stop()
+    total = time.perf_counter() - start
+
+    expected = "".join(segments)
+    assert keyboard.text == expected, f"{label}: text mismatch"
+    assert clipboard.get() == "previous clipboard", f"{label}: clipboard not restored"
+    chars = len(expected)
+    print(f"{label:<28} {chars / total:>10.0f} chars/s  "
+          f"blocked {blocked * 1000:>8.1f} ms  events {keyboard.events}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--event-delay", type=float, default=0.0002)
+    parser.add_argument("--segments", type=int, default=20)
+    args = parser.parse_args()
+
+    for words in (1, 4, 12):
+        segments = [SENTENCE * words] * args.segments
+        print(f"-- {args.segments} segments of {len(segments[0])} chars")
+        run("keystrokes", 0, False, segments, args.event_delay)
+        run("adaptive (paste >= 80)", 80, False, segments, args.event_delay)
+        run("adaptive + queued", 80, True, segments, args.event_delay)
+
+
+if __name__ == "__main__":
+    main()
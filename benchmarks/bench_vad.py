@@ -0,0 +1,92 @@
+"""
+Micro-benchmark for the VAD backends: per-chunk latency and resident memory.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_vad
+    python -m benchmarks.bench_vad --backend onnx --chunks 500
+
+Each backend runs in its own subprocess so the RSS numbers don't mix.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+CHUNK = 4096
+SAMPLE_RATE = 16000
+
+
+def max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def synthetic_chunks(count, seed=0):
+    """Alternating stretches of low noise and louder voiced-like signal."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(CHUNK) / SAMPLE_RATE
+    chunks = []
+    for i in range(count):
+        noise = rng.normal(0, 300, CHUNK)
+        if (i // 8) % 2:
+            noise += 6000 * np.sin(2 * np.pi * 180 * t) * (1 + np.sin(2 * np.pi * 3 * t))
+        chunks.append(np.clip(noise, -32768, 32767).astype(np.int16).tobytes())
+    return chunks
+
+
+def run_backend(backend, count):
+    rss_before = max_rss_mb()
+    start = time.perf_counter()
+    from engine.vad import SileroVAD
+    vad = SileroVAD(backend=backend)
+    load_s = time.perf_counter() - start
+
+    chunks = synthetic_chunks(count)
+    timings = np.empty(count)
+    for i, chunk in enumerate(chunks):
+        t0 = time.perf_counter()
+        vad.is_speech(chunk)
+        timings[i] = time.perf_counter() - t0
+
+    timings_ms = timings * 1000
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 3),
+        "chunk_ms_p50": round(float(np.percentile(timings_ms, 50)), 3),
+        "chunk_ms_p95": round(float(np.percentile(timings_ms, 95)), 3),
+        "chunk_ms_p99": round(float(np.percentile(timings_ms, 99)), 3),
+        "rss_start_mb": round(rss_before, 1),
+        "rss_peak_mb": round(max_rss_mb(), 1),
+        "torch_loaded": "torch" in sys.modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=["onnx", "torch"])
+    parser.add_argument("--chunks", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.chunks)))
+        return
+
+    for backend in ("torch", "onnx"):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_vad", "--backend", backend,
+             "--chunks", str(args.chunks)],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"[ERROR] {backend} backend failed:\n{result.stderr}")
+            continue
+        print(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Energy/ZCR pre-gate in front of Silero vs. always-Silero: idle CPU and onset recall.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_vad_gate
+    python -m benchmarks.bench_vad_gate --idle 300 --noise-db -45
+    python -m benchmarks.bench_vad_gate --wav speech.wav
+
+Idle: room noise (white noise, mains hum and occasional knocks) is run
+through both paths and the CPU time is scaled to one hour of audio.
+Onsets: utterances of formant-synthesized speech at several SNRs are mixed
+into the noise (or a 16 kHz WAV is used). Every speech onset found by the
+always-Silero path counts as a reference; recall is the share of those the
+cascade also finds within --tolerance-ms, with the extra delay it adds.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_replay import read_pcm
+from engine.vad import EnergyGate, SileroVAD
+from utils.metrics import metrics
+
+SAMPLE_RATE = 16000
+CHUNK = 512
+# F1-F3 of a few vowels
+FORMANTS = [(730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240), (530, 1840, 2480), (570, 840, 2410)]
+
+
+def room_noise(rng, seconds, level_db):
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    noise = rng.normal(0, 1, n) + 0.5 * np.sin(2 * np.pi * 50 * t)
+    for at in rng.uniform(0, seconds, int(seconds / 20)):
+        # A knock: short decaying burst
+        start = int(at * SAMPLE_RATE)
+        burst = rng.normal(0, 8, 800) * np.exp(-np.arange(800) / 150)
+        noise[start:start + 800] += burst[:len(noise) - start]
+    return noise * 10 ** (level_db / 20) / np.std(noise)
+
+
+def syllable(rng, n):
+    """A glottal pulse train at a gliding pitch, shaped by one vowel's formants."""
+    t = np.arange(n) / SAMPLE_RATE
+    f0 = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+    pulses = np.diff(np.floor(np.cumsum(f0 / SAMPLE_RATE)), prepend=0)
+    freqs = np.fft.rfftfreq(n, 1 / SAMPLE_RATE)
+    response = sum(
+        1 / (k + 1) / (1 + ((freqs - f) / (60 + 40 * k)) ** 2)
+        for k, f in enumerate(FORMANTS[rng.integers(len(FORMANTS))])
+    )
+    return np.fft.irfft(np.fft.rfft(pulses) * response, n) * np.sin(np.pi * np.arange(n) / n) ** 0.5
+
+
+def utterance(rng, seconds):
+    parts, total = [], 0
+    while total < seconds * SAMPLE_RATE:
+        parts.append(syllable(rng, int(rng.uniform(0.12, 0.3) * SAMPLE_RATE)))
+        parts.append(np.zeros(int(rng.uniform(0.02, 0.08) * SAMPLE_RATE)))
+        total += len(parts[-2]) + len(parts[-1])
+    speech = np.concatenate(parts)
+    return speech / np.std(speech)
+
+
+def speech_scene(rng, count, noise_db, snrs):
+    """Utterances 2-3 s long, 3-6 s apart, cycling through the SNRs."""
+    gaps = rng.uniform(3, 6, count + 1)
+    lengths = rng.uniform(2, 3, count)
+    signal = room_noise(rng, gaps.sum() + lengths.sum(), noise_db)
+    at = gaps[0]
+    for i in range(count):
+        speech = utterance(rng, lengths[i]) * 10 ** ((noise_db + snrs[i % len(snrs)]) / 20)
+        start = int(at * SAMPLE_RATE)
+        signal[start:start + len(speech)] += speech[:len(signal) - start]
+        at += lengths[i] + gaps[i + 1]
+    return signal
+
+
+def to_pcm(signal):
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def run(pcm, gate, backend):
+    """Returns (speech state per window, CPU seconds)."""
+    vad = SileroVAD(backend=backend, gate=EnergyGate() if gate else None)
+    step = CHUNK * 2
+    flags = []
+    start = time.process_time()
+    for i in range(0, len(pcm) - step + 1, step):
+        flags.extend(vad.speech_flags(pcm[i:i + step]))
+    return np.array(flags), time.process_time() - start
+
+
+def onsets(flags):
+    return np.flatnonzero(flags[1:] & ~flags[:-1]) + 1
+
+
+def gate_counters():
+    counters = metrics.snapshot()["counters"]
+    return {name: int(value) for name, value in counters.items() if name.startswith("vad_gate_")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--wav", help="16 kHz mono WAV with speech for the onset test")
+    parser.add_argument("--idle", type=float, default=120, help="seconds of idle room noise")
+    parser.add_argument("--noise-db", type=float, default=-50, help="room noise level, dBFS")
+    parser.add_argument("--utterances", type=int, default=30)
+    parser.add_argument("--snrs", type=float, nargs="+", default=[30, 20, 10])
+    parser.add_argument("--tolerance-ms", type=float, default=300)
+    parser.add_argument("--backend", default="onnx")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    window_ms = CHUNK * 1000 / SAMPLE_RATE
+
+    idle = to_pcm(room_noise(rng, args.idle, args.noise_db))
+    print(f"idle: {args.idle:g} s of room noise at {args.noise_db:g} dBFS")
+    for gate in (False, True):
+        metrics.reset()
+        flags, cpu_s = run(idle, gate, args.backend)
+        name = "cascade" if gate else "silero"
+        print(f"  {name:<8} {cpu_s * 3600 / args.idle:7.1f} CPU s per idle hour, "
+              f"{flags.mean() * 100:.1f}% flagged as speech")
+        if gate:
+            counters = gate_counters()
+            windows = len(flags)
+            print(f"           Silero ran on {(windows - counters.get('vad_gate_skipped', 0)) / windows * 100:.1f}% "
+                  f"of windows: {counters}")
+
+    if args.wav:
+        pcm = read_pcm(args.wav)
+        print(f"\nonsets: {args.wav}")
+    else:
+        pcm = to_pcm(speech_scene(rng, args.utterances, args.noise_db, args.snrs))
+        print(f"\nonsets: {args.utterances} synthetic utterances at SNR {', '.join(f'{s:g}' for s in args.snrs)} dB")
+
+    metrics.reset()
+    reference, silero_cpu = run(pcm, False, args.backend)
+    cascade, cascade_cpu = run(pcm, True, args.backend)
+    tolerance = int(args.tolerance_ms / window_ms)
+    found, delays = 0, []
+    for onset in onsets(reference):
+        # Found if the cascade flags speech near the onset (it may already be in speech)
+        near = np.flatnonzero(cascade[max(0, onset - tolerance):onset + tolerance + 1])
+        if len(near):
+            found += 1
+            delays.append((near[0] - min(onset, tolerance)) * window_ms)
+    total = len(onsets(reference))
+    print(f"  silero found {total} onsets, cascade {len(onsets(cascade))}; "
+          f"recall {found / total * 100 if total else 0:.1f}%")
+    if delays:
+        print(f"  cascade onset delay: mean {np.mean(delays):+.0f} ms, max {np.max(delays):+.0f} ms")
+    agreement = (reference == cascade).mean() * 100
+    print(f"  per-window agreement {agreement:.1f}%, CPU {silero_cpu:.2f} s -> {cascade_cpu:.2f} s")
+    print(f"  tiers: {gate_counters()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Local WebSocket stand-ins for Deepgram and WhisperLive.
+
+Both servers run on their own asyncio loop in a background thread and
+produce deterministic transcripts derived from the amount of audio
+received, so replay runs are comparable across machines and commits.
+NetworkProfile adds per-message delay, jitter and forced disconnects.
+"""
+import asyncio
+import json
+import random
+import struct
+import threading
+import urllib.parse
+import uuid
+from dataclasses import dataclass
+
+import websockets
+
+WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel")
+
+
+@dataclass
+class NetworkProfile:
+    delay_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Drop every connection this many seconds after it was opened (0 = never)
+    disconnect_after_s: float = 0.0
+    seed: int = 0
+    # Client -> server link speed; 0 = unlimited
+    uplink_kbps: float = 0.0
+
+
+def words_for(seconds, words_per_second=2.5):
+    count = int(seconds * words_per_second)
+    return " ".join(WORDS[i % len(WORDS)] for i in range(count))
+
+
+class MockServer:
+    """Runs handle(websocket) for every connection on a private event loop."""
+    def __init__(self, profile=None, host="127.0.0.1", port=0):
+        self.profile = profile or NetworkProfile()
+        self.host = host
+        self.port = port
+        self.rng = random.Random(self.profile.seed)
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.started = threading.Event()
+
+        self.connections = 0
+        self.disconnects = 0
+        self.bytes_received = 0
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        if not self.started.wait(timeout=5):
+            raise RuntimeError(f"{type(self).__name__} failed to start")
+        return self
+
+    def stop(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.server.close)
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        self.server = await websockets.serve(self._accept, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started.set()
+        await self.server.wait_closed()
+
+    async def _accept(self, websocket):
+        self.connections += 1
+        outbox = asyncio.Queue()
+        sender = asyncio.ensure_future(self._send_loop(websocket, outbox))
+        watchdog = None
+        if self.profile.disconnect_after_s:
+            watchdog = asyncio.ensure_future(self._drop_later(websocket))
+        try:
+            await self.handle(websocket, outbox.put_nowait)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            # Let queued replies go out before the socket closes
+            await outbox.put(None)
+            await sender
+            if watchdog:
+                watchdog.cancel()
+            await websocket.close()
+
+    async def _send_loop(self, websocket, outbox):
+        """Delays each reply by delay + jitter while keeping them in order."""
+        while True:
+            message = await outbox.get()
+            if message is None:
+                return
+            delay = self.profile.delay_ms + self.rng.uniform(0, self.profile.jitter_ms)
+            if delay:
+                await asyncio.sleep(delay / 1000)
+            try:
+                await websocket.send(json.dumps(message))
+            except websockets.exceptions.ConnectionClosed:
+                return
+
+    async def _drop_later(self, websocket):
+        await asyncio.sleep(self.profile.disconnect_after_s)
+        self.disconnects += 1
+        await websocket.close(code=1011, reason="mock disconnect")
+
+    async def receive_delay(self, size):
+        """Holds an incoming message as long as the limited uplink would."""
+        if self.profile.uplink_kbps:
+            await asyncio.sleep(size * 8 / (self.profile.uplink_kbps * 1000))
+
+    async def handle(self, websocket, send):
+        raise NotImplementedError
+
+
+def request_query(websocket):
+    # websockets >= 14 exposes the handshake as .request, older versions as .path
+    request = getattr(websocket, "request", None)
+    path = request.path if request is not None else websocket.path
+    return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(path).query))
+
+
+class MockDeepgramServer(MockServer):
+    """
+    Speaks the subset of the Deepgram live schema the client uses: Results
+    messages with interim results every interim_ms of audio, a final every
+    final_ms, and KeepAlive / Finalize / CloseStream control messages.
+    Audio duration is derived from the encoding query parameter (linear16,
+    mulaw) or, for containerized Ogg Opus, from the page granule positions.
+    """
+    def __init__(self, profile=None, interim_ms=250, final_ms=1500, **kwargs):
+        super().__init__(profile, **kwargs)
+        self.interim_ms = interim_ms
+        self.final_ms = final_ms
+
+    @staticmethod
+    def _duration_counter(query):
+        sample_rate = int(query.get("sample_rate", 16000))
+        encoding = query.get("encoding")
+        if encoding in ("linear16", "mulaw", None):
+            bytes_per_ms = sample_rate * (1 if encoding == "mulaw" else 2) / 1000
+            total = 0
+
+            def add(message):
+                nonlocal total
+                total += len(message)
+                return total / bytes_per_ms
+            return add
+
+        granule = 0
+
+        def add_ogg(message):
+            # Position of the last page in this message, in 48 kHz samples
+            nonlocal granule
+            page = message.rfind(b"OggS")
+            if page >= 0:
+                granule = max(granule, struct.unpack_from("<q", message, page + 6)[0])
+            return granule / 48
+        return add_ogg
+
+    def _result(self, request_id, start_s, end_s, is_final, from_finalize=False):
+        return {
+            "type": "Results",
+            "channel_index": [0, 1],
+            "duration": round(end_s - start_s, 3),
+            "start": round(start_s, 3),
+            "is_final": is_final,
+            "speech_final": is_final,
+            "from_finalize": from_finalize,
+            "channel": {
+                "alternatives": [{
+                    "transcript": words_for(end_s - start_s),
+                    "confidence": 0.99,
+                    "words": [],
+                }]
+            },
+            "metadata": {
+                "request_id": request_id,
+                "model_info": {"name": "mock", "version": "0", "arch": "mock"},
+                "model_uuid": request_id,
+            },
+        }
+
+    async def handle(self, websocket, send):
+        request_id = str(uuid.uuid4())
+        duration_ms = self._duration_counter(request_query(websocket))
+        audio_ms = 0.0
+        final_ms = 0.0
+        interim_at = 0.0
+
+        def flush(from_finalize=False):
+            nonlocal final_ms, interim_at
+            if audio_ms > final_ms:
+                send(self._result(request_id, final_ms / 1000, audio_ms / 1000, True, from_finalize))
+                final_ms = interim_at = audio_ms
+
+        async for message in websocket:
+            if isinstance(message, bytes):
+                await self.receive_delay(len(message))
+                self.bytes_received += len(message)
+                audio_ms = duration_ms(message)
+                if audio_ms - final_ms >= self.final_ms:
+                    flush()
+                elif audio_ms - interim_at >= self.interim_ms:
+                    interim_at = audio_ms
+                    send(self._result(request_id, final_ms / 1000, audio_ms / 1000, False))
+                continue
+
+            control = json.loads(message).get("type")
+            if control == "Finalize":
+                flush(from_finalize=True)
+            elif control == "CloseStream":
+                flush()
+                send({"type": "Metadata", "request_id": request_id, "duration": audio_ms / 1000})
+                return
+
+
+class MockWhisperLiveServer(MockServer):
+    """
+    Speaks the WhisperLive protocol: a JSON options message, SERVER_READY,
+    then `segments` updates (the last send_last_n_segments) every update_ms
+    of float32 audio, where the last segment grows until segment_ms of audio
+    has passed and is then completed.
+    """
+    def __init__(self, profile=None, update_ms=500, segment_ms=3000, sample_rate=16000, sample_width=4, **kwargs):
+        super().__init__(profile, **kwargs)
+        self.update_ms = update_ms
+        self.segment_ms = segment_ms
+        self.bytes_per_ms = sample_rate * sample_width / 1000
+
+    def _segments(self, audio_ms, final=False):
+        segments = []
+        start = 0.0
+        while start < audio_ms:
+            end = min(start + self.segment_ms, audio_ms)
+            segments.append({
+                "start": f"{start / 1000:.3f}",
+                "end": f"{end / 1000:.3f}",
+                "text": words_for((end - start) / 1000),
+                "completed": final or end - start >= self.segment_ms,
+            })
+            start = end
+        return segments
+
+    async def handle(self, websocket, send):
+        options = json.loads(await websocket.recv())
+        uid = options.get("uid", "mock")
+        last_n = options.get("send_last_n_segments", 10)
+        send({"uid": uid, "message": "SERVER_READY", "backend": "mock"})
+
+        audio_ms = 0.0
+        updated_at = 0.0
+        async for message in websocket:
+            if message == b"END_OF_AUDIO" or message == "END_OF_AUDIO":
+                send({"uid": uid, "segments": self._segments(audio_ms, final=True)[-last_n:]})
+                send({"uid": uid, "message": "DISCONNECT"})
+                return
+            if isinstance(message, bytes):
+                await self.receive_delay(len(message))
+                self.bytes_received += len(message)
+                audio_ms += len(message) / self.bytes_per_ms
+                if audio_ms - updated_at >= self.update_ms:
+                    updated_at = audio_ms
+                    send({"uid": uid, "segments": self._segments(audio_ms)[-last_n:]})
@@ -0,0 +1,63 @@
+"""
+Headless dictation daemon: microphone -> VAD -> transcription -> local clients.
+
+Usage:
+    python daemon.py --socket /tmp/ruttu.sock
+    python daemon.py --port 8765 --type
+    python daemon.py --socket /tmp/ruttu.sock --no-mic
+
+Runs the same pipeline as the tray app without a tray, Qt or keystroke
+injection (unless --type). Clients connect over WebSocket, on the Unix
+socket or on 127.0.0.1:PORT, to subscribe to the microphone's interim and
+final transcripts or to push PCM streams of their own; the protocol is
+described in engine/daemon.py. --socket and --port default to
+daemon_socket and daemon_port from config.json.
+"""
+import argparse
+import logging
+import os
+import signal
+import threading
+
+from main import RuttuApp
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--socket", help="Unix socket path")
+    parser.add_argument("--port", type=int, help="TCP port on 127.0.0.1")
+    parser.add_argument("--no-mic", action="store_true", help="only transcribe audio pushed by clients")
+    parser.add_argument("--type", action="store_true", help="also type finals into the focused window")
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"))
+    args = parser.parse_args()
+
+    app = RuttuApp(config_path=args.config, typing=args.type)
+    app.start_server(args.socket, args.port)
+    if not app.server:
+        parser.error("give --socket or --port (or set daemon_socket/daemon_port in config.json)")
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+
+    if not args.no_mic:
+        engine = app.config.get("transcription_engine", "deepgram")
+        if engine == "deepgram" and not app.config.get("api_key"):
+            parser.error("no API key set in config.json")
+        app.warm_up()
+        app.start_monitoring()
+        logger.info("Microphone dictation active")
+
+    stopped.wait()
+    logger.info("Shutting down")
+    if not args.no_mic:
+        app.stop_monitoring()
+    app.typist.stop()
+    app.server.stop()
+    app.config.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+from engine.event_loop import call_soon, in_loop_thread, submit
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+END_OF_STREAM = object()
+FINALIZE = object()
+
+class AsyncTranscriber:
+    """
+    Base class for engine sessions. Each session is a task on the shared
+    event loop; engines implement the async protocol below and inherit a
+    thread-safe facade (start, send_audio, finish, stop) that never blocks
+    the caller on network I/O.
+
+    Protocol:
+        open()        async context manager, connected once entered
+        receive()     handles results until the server closes the stream
+        send(data)    sends (or buffers) one chunk of int16 audio
+        flush()       sends anything send() buffered; also runs when no
+                      audio arrived for idle_flush seconds
+        end_utterance()  asks the server to finalize what was sent so far
+                      and keep the stream open (end of speech)
+        end_stream()  asks the server to flush the remaining results
+
+    Audio goes through a bounded asyncio.Queue; when the socket falls
+    behind, the oldest chunks are shed (and counted) instead of stalling
+    capture.
+    """
+    name = "Transcriber"
+    max_queued = 64
+    idle_flush = None
+
+    def __init__(self, transcription_callback):
+        self.callback = transcription_callback
+        self.connection_ready = threading.Event()
+        # Seconds of session audio covered by delivered finals
+        self.final_end = None
+        self.future = None
+        self.queue = None
+
+    def open(self):
+        raise NotImplementedError
+
+    async def receive(self):
+        raise NotImplementedError
+
+    async def send(self, data):
+        raise NotImplementedError
+
+    async def flush(self):
+        pass
+
+    async def end_utterance(self):
+        pass
+
+    async def end_stream(self):
+        pass
+
+    def start(self):
+        self.future = submit(self._run())
+
+    def send_audio(self, data, wait=False):
+        """
+        Queues data for the sender task. By default this never blocks (the
+        capture path); wait=True blocks until the queue has room instead,
+        for batch jobs that produce audio faster than real time.
+        """
+        if not self.connection_ready.is_set():
+            logger.debug("%s connection not ready, skipping audio chunk", self.name)
+            metrics.increment("audio_chunks_skipped")
+            return
+        if wait:
+            submit(self._put(data)).result(timeout=10)
+        else:
+            # Fire and forget: the loop's sender task does the actual I/O
+            call_soon(self._enqueue, data)
+
+    def keep_alive(self):
+        pass
+
+    def finalize(self):
+        """End of speech: queued behind the audio, so it covers everything sent before."""
+        if self.connection_ready.is_set():
+            call_soon(self._enqueue, FINALIZE)
+
+    def is_alive(self):
+        return bool(self.future and not self.future.done())
+
+    def finish(self, timeout=10.0):
+        """Lets the server flush the results for audio already sent, then stops."""
+        if self.connection_ready.is_set():
+            call_soon(self._enqueue, END_OF_STREAM)
+            self._wait(timeout)
+        self.stop()
+
+    def stop(self):
+        self.connection_ready.clear()
+        if self.future and not self.future.done():
+            self.future.cancel()
+            self._wait(2.0)
+
+    def _wait(self, timeout):
+        # Waiting on the loop thread itself would deadlock
+        if self.future and not in_loop_thread():
+            concurrent.futures.wait([self.future], timeout=timeout)
+
+    def _enqueue(self, item):
+        if self.queue is None:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            metrics.increment("send_queue_dropped")
+        self.queue.put_nowait(item)
+
+    async def _put(self, item):
+        if self.queue is not None:
+            await self.queue.put(item)
+
+    async def _run(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queued)
+        try:
+            async with self.open():
+                self.connection_ready.set()
+                receiver = asyncio.ensure_future(self.receive())
+                sender = asyncio.ensure_future(self._send_loop())
+                pending = {receiver, sender}
+                try:
+                    # The session lasts until the server closes the stream; a
+                    # failed sender ends it too, so the supervisor reconnects
+                    while receiver in pending:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        if sender in done and sender.exception():
+                            break
+                    for task in (sender, receiver):
+                        if task.done():
+                            task.result()
+                finally:
+                    receiver.cancel()
+                    sender.cancel()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{self.name} session failed: {e}")
+        finally:
+            self.connection_ready.clear()
+            self.queue = None
+
+    async def _send_loop(self):
+        while True:
+            if self.idle_flush:
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), self.idle_flush)
+                except asyncio.TimeoutError:
+                    await self.flush()
+                    continue
+            else:
+                item = await self.queue.get()
+            if item is END_OF_STREAM:
+                await self.flush()
+                await self.end_stream()
+                return
+            if item is FINALIZE:
+                await self.flush()
+                await self.end_utterance()
+                continue
+            with metrics.timer("send_audio_ms"):
+                await self.send(item)
+            metrics.increment("audio_bytes_sent", len(item))
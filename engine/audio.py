@@ -1,25 +1,87 @@
-import pyaudio
+import logging
+
+logger = logging.getLogger(__name__)
 
 class AudioStreamer:
-    def __init__(self, rate=16000, chunk=4096):
+    """
+    Microphone capture through PyAudio.
+    PortAudio is only loaded on warm_up()/start(), so creating the streamer
+    costs nothing at startup.
+
+    The device is opened at its native rate (or device_rate) with small
+    buffers; callers always get `rate` Hz mono int16 in chunks of about
+    `chunk` frames, resampled on the fly when the rates differ.
+    """
+    def __init__(self, rate=16000, chunk=512, device_rate=0):
         self.rate = rate
         self.chunk = chunk
-        self.p = pyaudio.PyAudio()
+        self.device_rate = device_rate
+        self.pyaudio = None
+        self.p = None
         self.stream = None
+        self.resampler = None
+        self.capture_latency_ms = None
+
+    def warm_up(self):
+        if self.p is None:
+            import pyaudio
+            self.pyaudio = pyaudio
+            self.p = pyaudio.PyAudio()
+
+    def native_rate(self):
+        if self.device_rate:
+            return int(self.device_rate)
+        try:
+            return int(self.p.get_default_input_device_info()["defaultSampleRate"])
+        except (IOError, OSError) as e:
+            logger.warning(f"No default input device info, assuming {self.rate} Hz: {e}")
+            return self.rate
 
     def start(self, callback):
+        """callback(in_data, overflow) is called from the PortAudio thread."""
+        self.warm_up()
+        pyaudio = self.pyaudio
+        device_rate = self.native_rate()
+        frames = max(1, round(self.chunk * device_rate / self.rate))
+
+        if device_rate != self.rate:
+            from engine.resample import PolyphaseResampler
+            self.resampler = PolyphaseResampler(device_rate, self.rate)
+            resample = self.resampler.process_int16
+        else:
+            self.resampler = None
+            resample = None
+
+        def stream_callback(in_data, frame_count, time_info, status):
+            if resample:
+                in_data = resample(in_data)
+            callback(in_data, bool(status & pyaudio.paInputOverflow))
+            return (None, pyaudio.paContinue)
+
         self.stream = self.p.open(
             format=pyaudio.paInt16,
             channels=1,
-            rate=self.rate,
+            rate=device_rate,
             input=True,
-            frames_per_buffer=self.chunk,
-            stream_callback=callback
+            frames_per_buffer=frames,
+            stream_callback=stream_callback
         )
         self.stream.start_stream()
 
+        # Device/driver latency + one buffer + resampler group delay
+        self.capture_latency_ms = (
+            self.stream.get_input_latency() * 1000
+            + frames * 1000 / device_rate
+            + (self.resampler.delay_ms if self.resampler else 0)
+        )
+        logger.info(f"Capturing at {device_rate} Hz, {frames} frames per buffer, "
+                    f"capture latency {self.capture_latency_ms:.1f} ms")
+
     def stop(self):
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
-        self.p.terminate()
+            self.stream = None
+        if self.p:
+            self.p.terminate()
+            self.p = None
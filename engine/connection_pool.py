@@ -0,0 +1,120 @@
+import threading
+import time
+
+from engine.transcriber import DeepgramTranscriber
+
+class DeepgramConnectionPool:
+    """
+    Keeps one pre-opened, idle Deepgram session so speech onset doesn't wait
+    for a WebSocket handshake. The spare is held open with KeepAlive messages,
+    handed over on acquire() and replenished in the background.
+    """
+    def __init__(self, config_manager, keepalive_interval=4.0):
+        self.config_manager = config_manager
+        self.keepalive_interval = keepalive_interval
+        self.spare = None
+        self.spare_params = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+
+        self.warm_handovers = 0
+        self.cold_handovers = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._maintain, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        self._discard_spare()
+
+    def acquire(self, callback):
+        """
+        Returns a started transcriber wired to callback. A warm spare is used
+        when it's connected with the current settings; otherwise a new one is
+        started (cold path) and the caller waits on connection_ready as before.
+        """
+        with self.lock:
+            spare, params = self.spare, self.spare_params
+            self.spare = None
+            self.spare_params = None
+
+        if spare and params == self._current_params() and spare.connection_ready.is_set():
+            self.warm_handovers += 1
+            transcriber = spare
+        else:
+            if spare:
+                spare.stop()
+            self.cold_handovers += 1
+            transcriber = self._create()
+        transcriber.callback = callback
+        self.wakeup.set()
+        return transcriber
+
+    def recycle(self):
+        """Drops the spare so the next one picks up changed language/model."""
+        self._discard_spare()
+        self.wakeup.set()
+
+    def _current_params(self):
+        return (
+            self.config_manager.get("api_key"),
+            self.config_manager.get("language"),
+            self.config_manager.get("model"),
+            self.config_manager.get("deepgram_url"),
+            self.config_manager.get("deepgram_endpointing_ms"),
+            self.config_manager.get("deepgram_utterance_end_ms"),
+            self.config_manager.get("deepgram_encoding"),
+        )
+
+    def _create(self):
+        transcriber = DeepgramTranscriber.from_config(self.config_manager, None)
+        transcriber.start()
+        return transcriber
+
+    def _discard_spare(self):
+        with self.lock:
+            spare = self.spare
+            self.spare = None
+            self.spare_params = None
+        if spare:
+            spare.stop()
+
+    def _maintain(self):
+        last_keepalive = 0
+        next_attempt = 0
+        while self.running:
+            with self.lock:
+                spare, params = self.spare, self.spare_params
+            if spare and (not spare.is_alive() or params != self._current_params()):
+                if not spare.is_alive():
+                    # Don't hammer the API when the socket keeps dying (bad key, offline)
+                    next_attempt = time.time() + self.keepalive_interval
+                self._discard_spare()
+                spare = None
+
+            if spare is None and time.time() >= next_attempt:
+                params = self._current_params()
+                spare = self._create()
+                with self.lock:
+                    if self.running:
+                        self.spare, self.spare_params = spare, params
+                        spare = None
+                if spare:
+                    spare.stop()
+                last_keepalive = time.time()
+            elif spare and time.time() - last_keepalive >= self.keepalive_interval:
+                spare.keep_alive()
+                last_keepalive = time.time()
+
+            self.wakeup.wait(timeout=1.0)
+            self.wakeup.clear()
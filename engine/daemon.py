@@ -0,0 +1,302 @@
+"""
+Local transcription service: WebSocket over a Unix socket and/or TCP.
+
+Client -> server (JSON text messages, audio as binary messages):
+    {"type": "subscribe", "interim": true}   receive the microphone transcripts
+    {"type": "unsubscribe"}
+    {"type": "start", "engine": "deepgram", "language": "en"}
+                                             open a session for pushed audio;
+                                             both fields optional (config default)
+    <binary>                                 16 kHz mono int16 PCM for the session
+    {"type": "finish"}                       flush the session's finals and close it
+
+Server -> client:
+    {"type": "transcript", "source": "mic" | "stream", "text": "...", "is_final": true}
+    {"type": "finished"}                     after finish, all finals were sent
+    {"type": "error", "message": "..."}
+
+The TCP listener refuses browser connections (any Origin header), so
+only local programs can use it.
+"""
+import asyncio
+import collections
+import contextlib
+import json
+import logging
+import os
+import time
+
+import websockets
+
+from engine.event_loop import call_soon, submit
+from engine.registry import create_transcriber, load_engine
+from engine.resilient import ResilientTranscriber
+from utils.filters import TextProcessor
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+class SessionConfig:
+    """Per-session overrides (engine, language) on top of the shared config."""
+    def __init__(self, config_manager, overrides):
+        self.config_manager = config_manager
+        self.overrides = overrides
+
+    def get(self, key, default=None):
+        if key in self.overrides:
+            return self.overrides[key]
+        return self.config_manager.get(key, default)
+
+    def subscribe(self, callback, keys=None):
+        self.config_manager.subscribe(callback, keys)
+
+
+class ClientChannel:
+    """
+    Outgoing messages of one client. A slow reader never stalls the others:
+    past max_pending, its oldest interim is dropped (a newer one supersedes
+    it anyway); if only finals are pending the client is disconnected.
+    """
+    def __init__(self, websocket, max_pending=256):
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self.pending = collections.deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.subscribed = False
+        self.interim = True
+
+    def offer(self, message):
+        if self.closed:
+            return
+        if len(self.pending) >= self.max_pending:
+            interim = next((m for m in self.pending if m.get("is_final") is False), None)
+            if interim is None:
+                logger.warning("Client fell too far behind, disconnecting it")
+                metrics.increment("daemon_clients_dropped")
+                self.closed = True
+                asyncio.ensure_future(self.websocket.close(code=1008, reason="too slow"))
+                return
+            self.pending.remove(interim)
+            metrics.increment("daemon_interims_dropped")
+        self.pending.append(message)
+        self.ready.set()
+
+    async def run(self):
+        while not self.closed:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.pending:
+                try:
+                    await self.websocket.send(json.dumps(self.pending.popleft()))
+                except websockets.exceptions.ConnectionClosed:
+                    self.closed = True
+                    return
+
+
+class DictationServer:
+    """
+    Serves transcripts to local clients. The microphone pipeline publishes
+    into it (every subscriber gets a copy), and clients can push their own
+    PCM streams, each transcribed by its own ResilientTranscriber session
+    on the existing engines. Everything runs on the shared event loop.
+
+    Pushed audio is read no faster than max_ahead_ms ahead of real time, so
+    a client streaming a file is throttled through its own socket instead
+    of overflowing the engine queue.
+    """
+    def __init__(self, config_manager, socket_path=None, port=0, host="127.0.0.1",
+                 max_sessions=8, max_pending=256, max_ahead_ms=2000):
+        self.config_manager = config_manager
+        self.socket_path = socket_path
+        self.port = port
+        self.host = host
+        self.max_sessions = max_sessions
+        self.max_pending = max_pending
+        self.max_ahead = max_ahead_ms / 1000
+        self.processor = TextProcessor(config_manager)
+        self.clients = set()
+        self.sessions = 0
+        self.servers = []
+
+    @classmethod
+    def from_config(cls, config_manager, socket_path=None, port=None):
+        return cls(
+            config_manager,
+            socket_path=socket_path if socket_path is not None else config_manager.get("daemon_socket"),
+            port=port if port is not None else config_manager.get("daemon_port"),
+            max_sessions=config_manager.get("daemon_max_sessions", 8),
+            max_pending=config_manager.get("daemon_max_pending", 256),
+        )
+
+    def start(self):
+        """Starts listening; returns once the sockets are bound."""
+        submit(self._listen()).result(timeout=10)
+        return self
+
+    def stop(self):
+        submit(self._close()).result(timeout=5)
+
+    def publish(self, text, is_final, source="mic"):
+        """Thread-safe: hands a microphone transcript to every subscriber."""
+        call_soon(self._broadcast, {"type": "transcript", "source": source, "text": text, "is_final": is_final})
+
+    def _broadcast(self, message):
+        for client in self.clients:
+            if client.subscribed and (message["is_final"] or client.interim):
+                client.offer(message)
+
+    async def _listen(self):
+        if self.socket_path:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+            self.servers.append(await websockets.unix_serve(self._accept, self.socket_path))
+            logger.info(f"Listening on {self.socket_path}")
+        if self.port:
+            # Only clients that send no Origin header: a web page in the user's
+            # browser must not read the microphone or spend the API key
+            server = await websockets.serve(self._accept, self.host, self.port, origins=[None])
+            self.port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+            logger.info(f"Listening on ws://{self.host}:{self.port}")
+
+    async def _close(self):
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+        if self.socket_path:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+
+    async def _accept(self, websocket):
+        client = ClientChannel(websocket, self.max_pending)
+        self.clients.add(client)
+        metrics.increment("daemon_clients")
+        writer = asyncio.ensure_future(client.run())
+        session = None
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    if session:
+                        await session.push(message)
+                    continue
+                try:
+                    request = json.loads(message)
+                except ValueError:
+                    client.offer({"type": "error", "message": "invalid JSON"})
+                    continue
+                kind = request.get("type")
+                if kind == "subscribe":
+                    client.subscribed = True
+                    client.interim = request.get("interim", True)
+                elif kind == "unsubscribe":
+                    client.subscribed = False
+                elif kind == "start":
+                    if session:
+                        client.offer({"type": "error", "message": "a session is already open"})
+                    else:
+                        session = self._open_session(client, request)
+                elif kind == "finish":
+                    if session:
+                        await session.finish()
+                        session = None
+                    client.offer({"type": "finished"})
+                else:
+                    client.offer({"type": "error", "message": f"unknown message type: {kind}"})
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            if session:
+                session.stop()
+            self.clients.discard(client)
+            client.closed = True
+            client.ready.set()
+            await writer
+
+    def _open_session(self, client, request):
+        if self.sessions >= self.max_sessions:
+            client.offer({"type": "error", "message": f"at most {self.max_sessions} sessions"})
+            return None
+        overrides = {}
+        if request.get("language"):
+            overrides["language"] = request["language"]
+        engine = request.get("engine") or self.config_manager.get("transcription_engine", "deepgram")
+        try:
+            load_engine(engine)
+        except ValueError as e:
+            client.offer({"type": "error", "message": str(e)})
+            return None
+        config = SessionConfig(self.config_manager, overrides)
+        try:
+            return PushSession(self, client, engine, config)
+        except Exception as e:
+            logger.error(f"Could not open a {engine} session: {e}")
+            client.offer({"type": "error", "message": str(e)})
+            return None
+
+
+class PushSession:
+    """One client's pushed PCM stream and the transcriber it feeds."""
+    def __init__(self, server, client, engine, config):
+        self.server = server
+        self.client = client
+
+        def on_transcript(text, is_final):
+            # Same exclusions and voice commands as the microphone path
+            processed = server.processor.process_segment(text, is_final)
+            if processed:
+                call_soon(client.offer, {"type": "transcript", "source": "stream", "text": processed,
+                                         "is_final": is_final})
+
+        def open_session(callback):
+            transcriber = create_transcriber(engine, config, callback)
+            transcriber.start()
+            return transcriber
+
+        self.transcriber = ResilientTranscriber(
+            open_session,
+            on_transcript,
+            buffer_ms=config.get("reconnect_buffer_ms", 10000),
+            sample_rate=SAMPLE_RATE
+        )
+        self.transcriber.start()
+        self.started_at = time.perf_counter()
+        self.pushed_s = 0.0
+        # Odd byte of the last frame: only whole int16 samples reach the engine
+        self.carry = b""
+        # Counted only once built, so a session that fails to start holds no slot
+        server.sessions += 1
+        metrics.increment("daemon_sessions")
+        self.open = True
+
+    async def push(self, data):
+        data = self.carry + data
+        whole = len(data) - len(data) % 2
+        self.carry = data[whole:]
+        data = data[:whole]
+        if data:
+            self.transcriber.send_audio(data)
+        self.pushed_s += len(data) / 2 / SAMPLE_RATE
+        # Stop reading this client's socket while it is too far ahead of real time
+        ahead = self.pushed_s - (time.perf_counter() - self.started_at)
+        if ahead > self.server.max_ahead:
+            await asyncio.sleep(ahead - self.server.max_ahead)
+
+    async def finish(self):
+        # finish() waits for the last finals, which arrive on this loop
+        await asyncio.get_running_loop().run_in_executor(None, self.transcriber.finish)
+        self._closed()
+
+    def stop(self):
+        # stop() joins the supervisor, which runs on this loop
+        asyncio.get_running_loop().run_in_executor(None, self.transcriber.stop)
+        self._closed()
+
+    def _closed(self):
+        if self.open:
+            self.open = False
+            self.server.sessions -= 1
@@ -0,0 +1,183 @@
+import struct
+
+import numpy as np
+
+
+def _mulaw_table():
+    """G.711 mu-law code for every int16 value, indexed by the value as uint16."""
+    x = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2
+    mask = np.where(x < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(x), 8159) + 33
+    segment = np.floor(np.log2(magnitude)).astype(np.int32) - 5
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    # Clipped values overflow into segment 8 and map to the largest code
+    code = np.where(segment >= 8, 0x7F, code)
+    return (code ^ mask).astype(np.uint8)
+
+
+class Linear16Encoder:
+    """Raw 16-bit PCM, unchanged (256 kbit/s at 16 kHz)."""
+    encoding = "linear16"
+    # Runs inline on the event loop; heavy encoders go to a worker thread
+    heavy = False
+
+    def __init__(self, sample_rate=16000):
+        self.sample_rate = sample_rate
+
+    def connect_params(self):
+        return {"encoding": self.encoding, "sample_rate": self.sample_rate}
+
+    def encode(self, data):
+        return data
+
+    def flush(self):
+        return b""
+
+
+class MulawEncoder(Linear16Encoder):
+    """G.711 mu-law, 8 bits per sample (128 kbit/s); one table lookup per chunk."""
+    encoding = "mulaw"
+    _table = None
+
+    def __init__(self, sample_rate=16000):
+        super().__init__(sample_rate)
+        if MulawEncoder._table is None:
+            MulawEncoder._table = _mulaw_table()
+
+    def encode(self, data):
+        return self._table[np.frombuffer(data, dtype=np.uint16)].tobytes()
+
+
+def _ogg_crc_table():
+    table = []
+    for i in range(256):
+        r = i << 24
+        for _ in range(8):
+            r = ((r << 1) ^ 0x04C11DB7) if r & 0x80000000 else (r << 1)
+        table.append(r & 0xFFFFFFFF)
+    return table
+
+
+class OggOpusEncoder(Linear16Encoder):
+    """
+    Opus packets in Ogg pages (about 24 kbit/s by default). Needs the
+    optional opuslib package and libopus. Samples are encoded in 20 ms
+    frames; every chunk yields the pages holding the frames completed so
+    far, so each WebSocket message is a self-contained piece of the stream.
+    """
+    encoding = "ogg-opus"
+    heavy = True
+    FRAME_MS = 20
+    PRE_SKIP = 312
+    _crc_table = None
+
+    def __init__(self, sample_rate=16000, bitrate=24000):
+        super().__init__(sample_rate)
+        try:
+            import opuslib
+        except Exception as e:
+            # opuslib raises a plain Exception when libopus itself is missing
+            raise RuntimeError("Opus encoding needs the opuslib package (pip install opuslib) and libopus") from e
+        self.encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+        self.encoder.bitrate = bitrate
+        if OggOpusEncoder._crc_table is None:
+            OggOpusEncoder._crc_table = _ogg_crc_table()
+
+        self.frame_bytes = sample_rate * self.FRAME_MS // 1000 * 2
+        self.pending = bytearray()
+        self.serial = 0x52555454
+        self.sequence = 0
+        self.granule = 0
+        self.headers_sent = False
+
+    def connect_params(self):
+        # Containerized audio: Deepgram reads the format from the stream
+        return {}
+
+    def _page(self, lacing, body, granule, header_type=0):
+        header = struct.pack(
+            "<4sBBqIIIB", b"OggS", 0, header_type, granule, self.serial, self.sequence, 0, len(lacing)
+        )
+        page = bytearray(header + lacing + body)
+        crc = 0
+        table = self._crc_table
+        for byte in page:
+            crc = ((crc << 8) & 0xFFFFFFFF) ^ table[((crc >> 24) ^ byte) & 0xFF]
+        page[22:26] = struct.pack("<I", crc)
+        self.sequence += 1
+        return bytes(page)
+
+    def _pages(self, packets, first=False, last=False):
+        """
+        Packs (packet, granule) pairs into pages of at most 255 lacing values.
+        A packet cut at a page boundary goes on in the next page, which is
+        flagged as a continuation; each page carries the granule position of
+        the last packet that ends on it, or -1 if none does.
+        """
+        pages = []
+        lacing, body, granule, header_type = bytearray(), bytearray(), -1, 0
+        for packet, end in packets:
+            for offset in range(0, len(packet) + 1, 255):
+                segment = packet[offset:offset + 255]
+                lacing.append(len(segment))
+                body += segment
+                if len(segment) < 255:
+                    granule = end
+                if len(lacing) == 255:
+                    pages.append([lacing, body, granule, header_type])
+                    header_type = 0x01 if len(segment) == 255 else 0
+                    lacing, body, granule = bytearray(), bytearray(), -1
+        if lacing:
+            pages.append([lacing, body, granule, header_type])
+        if pages and first:
+            pages[0][3] |= 0x02
+        if pages and last:
+            pages[-1][3] |= 0x04
+        return b"".join(self._page(*page) for page in pages)
+
+    def _headers(self):
+        head = struct.pack("<8sBBHIhB", b"OpusHead", 1, 1, self.PRE_SKIP, self.sample_rate, 0, 0)
+        vendor = b"ruttu"
+        tags = b"OpusTags" + struct.pack("<I", len(vendor)) + vendor + struct.pack("<I", 0)
+        return self._pages([(head, 0)], first=True) + self._pages([(tags, 0)])
+
+    def encode(self, data):
+        out = b""
+        if not self.headers_sent:
+            self.headers_sent = True
+            out = self._headers()
+        self.pending += data
+        packets = []
+        samples = self.frame_bytes // 2
+        while len(self.pending) >= self.frame_bytes:
+            frame = bytes(self.pending[:self.frame_bytes])
+            del self.pending[:self.frame_bytes]
+            # Granule positions always count 48 kHz samples
+            self.granule += samples * 48000 // self.sample_rate
+            packets.append((self.encoder.encode(frame, samples), self.granule))
+        return out + self._pages(packets)
+
+    def flush(self):
+        """Pads the last partial frame and closes the stream."""
+        if self.pending:
+            self.pending += bytes(self.frame_bytes - len(self.pending))
+            packet = self.encoder.encode(bytes(self.pending), self.frame_bytes // 2)
+            self.pending.clear()
+            self.granule += self.frame_bytes // 2 * 48000 // self.sample_rate
+            return self._pages([(packet, self.granule)], last=True)
+        return b""
+
+
+ENCODERS = {
+    "linear16": Linear16Encoder,
+    "mulaw": MulawEncoder,
+    "ogg-opus": OggOpusEncoder,
+}
+
+
+def create_encoder(name, sample_rate=16000, bitrate=24000):
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown audio encoding: {name}")
+    if name == "ogg-opus":
+        return OggOpusEncoder(sample_rate, bitrate=bitrate)
+    return ENCODERS[name](sample_rate)
@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+# One long-lived loop owns every network session, so utterances don't
+# create threads or event loops of their own.
+_loop = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Returns the shared event loop, starting its thread on first use."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="asyncio-loop", daemon=True).start()
+        return _loop
+
+
+def in_loop_thread():
+    try:
+        return asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        return False
+
+
+def submit(coro):
+    """Schedules coro on the shared loop; returns a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def call_soon(callback, *args):
+    get_loop().call_soon_threadsafe(callback, *args)
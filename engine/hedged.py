@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+
+from engine.event_loop import call_soon, get_loop
+from engine.registry import create_transcriber
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class AnyReady:
+    """connection_ready view that is set while any of the engines is connected."""
+    def __init__(self, engines):
+        self.engines = engines
+
+    def is_set(self):
+        return any(e.connection_ready.is_set() for e in list(self.engines.values()))
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.is_set():
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+class HedgedTranscriber:
+    """
+    Streams the same audio to several engines and keeps the fastest.
+
+    The session is usable as soon as any engine connects. Interims come
+    from whichever engine produced one first; the first engine to deliver a
+    final wins, its results are used from then on and the others are
+    stopped. Losers keep running in the background for up to shadow_s (their
+    results ignored) so their first-final latency can be recorded. An engine
+    that fails before a winner is chosen is simply dropped from the race.
+    Audio sent before an engine has connected is held (up to
+    max_backlog_ms) and replayed to it on connect.
+    """
+    def __init__(self, engine_names, config_manager, transcription_callback,
+                 shadow_s=2.0, max_backlog_ms=10000, sample_rate=16000):
+        self.callback = transcription_callback
+        self.engines = {}
+        for name in engine_names:
+            self.engines[name] = create_transcriber(
+                name, config_manager,
+                lambda text, is_final, name=name: self._on_transcript(name, text, is_final)
+            )
+        self.connection_ready = AnyReady(self.engines)
+        self.shadow_s = shadow_s
+        self.max_backlog = int(max_backlog_ms * sample_rate * 2 / 1000)
+
+        self.lock = threading.Lock()
+        self.backlog = []
+        self.backlog_bytes = 0
+        self.sent = {name: 0 for name in self.engines}
+        self.started_at = None
+        self.first_final = {}
+        self.leader = None
+        self.winner = None
+
+    @classmethod
+    def from_config(cls, config_manager, transcription_callback):
+        return cls(config_manager.get("hedge_engines"), config_manager, transcription_callback,
+                   shadow_s=config_manager.get("hedge_shadow_s"))
+
+    @property
+    def final_end(self):
+        return self.engines[self.winner].final_end if self.winner in self.engines else None
+
+    def start(self):
+        for engine in self.engines.values():
+            engine.start()
+
+    def send_audio(self, data, wait=False):
+        sends = []
+        with self.lock:
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+            if self.winner is None:
+                self._hold(data)
+            for name, engine in list(self.engines.items()):
+                if not engine.connection_ready.is_set():
+                    continue
+                if self.winner is None:
+                    # Catch up on everything since the start, this chunk included
+                    pending = self.backlog[self.sent[name]:]
+                    self.sent[name] = len(self.backlog)
+                    if pending:
+                        sends.append((engine, b"".join(pending)))
+                else:
+                    sends.append((engine, data))
+            if self.winner is None:
+                self._trim()
+        # Outside the lock: with wait=True this blocks on the loop, whose callbacks take the lock
+        for engine, chunk in sends:
+            engine.send_audio(chunk, wait=wait)
+
+    def _trim(self):
+        """Forgets the audio every remaining engine has already been sent."""
+        done = min((self.sent[name] for name in self.engines), default=0)
+        if done:
+            self.backlog_bytes -= sum(len(chunk) for chunk in self.backlog[:done])
+            del self.backlog[:done]
+            for name in self.sent:
+                self.sent[name] = max(0, self.sent[name] - done)
+
+    def _hold(self, data):
+        self.backlog.append(data)
+        self.backlog_bytes += len(data)
+        if self.backlog_bytes > self.max_backlog:
+            # An engine this far behind can't win anymore
+            for name, engine in list(self.engines.items()):
+                if not engine.connection_ready.is_set():
+                    logger.warning(f"Hedging: {name} did not connect in time, dropping it")
+                    self._drop(name)
+
+    def keep_alive(self):
+        for engine in list(self.engines.values()):
+            engine.keep_alive()
+
+    def finalize(self):
+        for engine in list(self.engines.values()):
+            engine.finalize()
+
+    def is_alive(self):
+        return any(engine.is_alive() for engine in list(self.engines.values()))
+
+    def finish(self, timeout=10.0):
+        deadline = time.time() + timeout
+        for name, engine in list(self.engines.items()):
+            if self.winner in (None, name):
+                engine.finish(timeout=max(0.1, deadline - time.time()))
+            else:
+                engine.stop()
+
+    def stop(self):
+        for engine in list(self.engines.values()):
+            engine.stop()
+
+    def _drop(self, name):
+        engine = self.engines.pop(name, None)
+        if engine:
+            # stop() may join a worker thread: keep it off the shared loop and the callers
+            call_soon(get_loop().run_in_executor, None, engine.stop)
+
+    def _on_transcript(self, name, text, is_final):
+        won = False
+        with self.lock:
+            if is_final and name not in self.first_final and self.started_at is not None:
+                self.first_final[name] = (time.perf_counter() - self.started_at) * 1000
+                metrics.observe(f"hedge_first_final_ms_{name}", self.first_final[name])
+                if self.winner and name != self.winner:
+                    metrics.observe("hedge_margin_ms", self.first_final[name] - self.first_final[self.winner])
+                    self._drop(name)
+
+            if self.winner is None:
+                # Drop engines that failed before delivering anything
+                for other, engine in list(self.engines.items()):
+                    if other != name and not engine.is_alive():
+                        logger.warning(f"Hedging: {other} failed, continuing without it")
+                        self._drop(other)
+                if is_final:
+                    self.winner = name
+                    self.backlog = []
+                    self.backlog_bytes = 0
+                    won = True
+                elif self.leader is None:
+                    self.leader = name
+            source = self.winner or self.leader
+
+        if won:
+            self._announce(name)
+        if name != source:
+            return
+        if self.callback:
+            self.callback(text, is_final)
+
+    def _announce(self, name):
+        metrics.increment(f"hedge_wins_{name}")
+        logger.info(f"Hedging: {name} delivered the first final")
+        for other in list(self.engines):
+            if other != name:
+                # Keep the loser briefly to measure how far behind it was
+                call_soon(get_loop().call_later, self.shadow_s, self._drop, other)
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+
+class LiveTypist:
+    """
+    Types interim hypotheses as they arrive and corrects them in place.
+    A new hypothesis only costs backspaces for the part that changed plus the
+    new suffix. Interims arriving faster than min_interval_ms are coalesced
+    so only the latest one is rendered.
+    """
+    def __init__(self, typist, min_interval_ms=150):
+        self.typist = typist
+        self.min_interval = min_interval_ms / 1000
+        self.on_screen = ""
+        self.pending = None
+        self.last_render = 0
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def update(self, text):
+        """Shows an interim hypothesis (rate limited)."""
+        with self.lock:
+            self.pending = text
+            wait = self.last_render + self.min_interval - time.monotonic()
+            if wait <= 0:
+                self._flush()
+            elif not self.timer:
+                self.timer = threading.Timer(wait, self._on_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def commit(self, text):
+        """Replaces the on-screen hypothesis with the final text and starts a new segment."""
+        with self.lock:
+            self._cancel_timer()
+            self.pending = None
+            self._render(text)
+            self.on_screen = ""
+
+    def reset(self):
+        """Forgets the current hypothesis, leaving whatever is on screen."""
+        with self.lock:
+            self._cancel_timer()
+            self.pending = None
+            self.on_screen = ""
+
+    def _on_timer(self):
+        with self.lock:
+            self.timer = None
+            if self.pending is not None:
+                self._flush()
+
+    def _cancel_timer(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
+    def _flush(self):
+        text = self.pending
+        self.pending = None
+        self._render(text)
+        self.last_render = time.monotonic()
+
+    def _render(self, text):
+        keep = len(os.path.commonprefix([self.on_screen, text]))
+        erase = len(self.on_screen) - keep
+        if erase:
+            self.typist.backspace(erase)
+        if text[keep:]:
+            self.typist.type_text(text[keep:])
+        self.on_screen = text
@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Loaded models by (size, compute_type, cpu_threads), shared by all sessions
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(size, compute_type="int8", cpu_threads=0):
+    key = (size, compute_type, cpu_threads)
+    with _models_lock:
+        if key not in _models:
+            from faster_whisper import WhisperModel
+            start = time.perf_counter()
+            _models[key] = WhisperModel(size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+            logger.info(f"Loaded local model {size} ({compute_type}) in {time.perf_counter() - start:.1f} s")
+        return _models[key]
+
+
+class LocalWhisperTranscriber:
+    """
+    In-process, CPU-only streaming ASR on faster-whisper (CTranslate2).
+
+    Audio accumulates in a sliding window starting at the last committed
+    point. Every step_ms of new audio a worker thread re-decodes the window:
+    segments that ended well before the window's edge and appeared the same
+    way in the previous pass are committed as finals and cut from the
+    window; the rest is reported as an interim. The window never grows past
+    window_s: beyond that everything but the last segment is committed.
+    """
+    SAMPLE_RATE = 16000
+    # A segment this close to the window edge may still change
+    EDGE_S = 1.0
+
+    def __init__(self, config_manager, transcription_callback, model_size="base", compute_type="int8",
+                 cpu_threads=0, step_ms=500, window_s=15.0):
+        self.config_manager = config_manager
+        self.callback = transcription_callback
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.step = int(self.SAMPLE_RATE * step_ms / 1000)
+        self.window = int(self.SAMPLE_RATE * window_s)
+        self.connection_ready = threading.Event()
+
+        self.language_map = {"en": "en", "ru": "ru", "ee": "et"}
+        self.cond = threading.Condition()
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.committed = 0      # samples of session audio already committed
+        self.undecoded = 0      # samples received since the last decode
+        self.finishing = False
+        self.finalizing = False
+        self.stopping = False
+        self.model = None
+        self.worker = None
+        self.previous = []
+        self.context = ""
+        self.final_end = None
+
+    @classmethod
+    def from_config(cls, config_manager, transcription_callback):
+        return cls(
+            config_manager,
+            transcription_callback,
+            model_size=config_manager.get("local_model", "base"),
+            compute_type=config_manager.get("local_compute_type", "int8"),
+            cpu_threads=config_manager.get("local_cpu_threads", 0),
+            step_ms=config_manager.get("local_step_ms", 500),
+            window_s=config_manager.get("local_window_s", 15.0),
+        )
+
+    @classmethod
+    def preload(cls, config_manager):
+        """Loads the model ahead of the first utterance (called from warm-up)."""
+        load_model(
+            config_manager.get("local_model", "base"),
+            config_manager.get("local_compute_type", "int8"),
+            config_manager.get("local_cpu_threads", 0),
+        )
+
+    def start(self):
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def send_audio(self, data, wait=False):
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768
+        with self.cond:
+            self.audio = np.concatenate([self.audio, samples])
+            self.undecoded += len(samples)
+            if self.undecoded >= self.step:
+                self.cond.notify()
+
+    def keep_alive(self):
+        pass
+
+    def finalize(self):
+        """End of speech: decodes now and commits the whole window."""
+        with self.cond:
+            self.finalizing = True
+            self.cond.notify()
+
+    def is_alive(self):
+        return bool(self.worker and self.worker.is_alive())
+
+    def finish(self, timeout=10.0):
+        """Decodes whatever is left, commits it as final, then stops."""
+        with self.cond:
+            self.finishing = True
+            self.cond.notify()
+        if self.worker:
+            self.worker.join(timeout=timeout)
+        self.stop()
+
+    def stop(self):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+        self.connection_ready.clear()
+        if self.worker:
+            self.worker.join(timeout=2.0)
+            self.worker = None
+
+    def _run(self):
+        try:
+            self.model = load_model(self.model_size, self.compute_type, self.cpu_threads)
+        except Exception as e:
+            logger.error(f"Local model failed to load: {e}")
+            return
+        self.connection_ready.set()
+
+        while True:
+            with self.cond:
+                while not (self.stopping or self.finishing or self.finalizing or self.undecoded >= self.step):
+                    self.cond.wait()
+                if self.stopping:
+                    return
+                finishing = self.finishing
+                final = finishing or self.finalizing
+                self.finalizing = False
+                window = self.audio
+                self.undecoded = 0
+            if len(window):
+                self._decode(window, final)
+            if finishing:
+                return
+
+    def _decode(self, window, final):
+        start = time.perf_counter()
+        segments, _ = self.model.transcribe(
+            window,
+            language=self.language_map.get(self.config_manager.get("language"), "en"),
+            beam_size=1,
+            condition_on_previous_text=False,
+            initial_prompt=self.context or None,
+        )
+        segments = [(s.start, s.end, s.text.strip()) for s in segments]
+        elapsed = time.perf_counter() - start
+        metrics.observe("local_decode_ms", elapsed * 1000)
+        metrics.observe("local_rtf", elapsed / (len(window) / self.SAMPLE_RATE))
+
+        window_s = len(window) / self.SAMPLE_RATE
+        if final:
+            stable = len(segments)
+        elif len(window) >= self.window:
+            stable = max(len(segments) - 1, 1 if len(segments) == 1 else 0)
+        else:
+            # Local agreement: finished, away from the edge, same as last pass
+            stable = 0
+            for i, segment in enumerate(segments[:-1]):
+                if segment[1] > window_s - self.EDGE_S or i >= len(self.previous) or self.previous[i][2] != segment[2]:
+                    break
+                stable = i + 1
+        self.previous = segments[stable:]
+
+        if final or (not segments and len(window) >= self.window):
+            # Without segments (noise, a cough, trailing silence) the audio is committed as empty
+            cut = len(window)
+        elif stable:
+            cut = int(segments[stable - 1][1] * self.SAMPLE_RATE)
+        else:
+            cut = 0
+        if cut:
+            with self.cond:
+                self.audio = self.audio[cut:]
+                self.committed += cut
+            self.final_end = self.committed / self.SAMPLE_RATE
+        if stable:
+            text = " ".join(s[2] for s in segments[:stable] if s[2])
+            if text:
+                self.context = (self.context + " " + text)[-200:]
+                if self.callback:
+                    self.callback(text, True)
+        interim = " ".join(s[2] for s in segments[stable:] if s[2])
+        if interim and not final and self.callback:
+            self.callback(interim, False)
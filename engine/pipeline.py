@@ -0,0 +1,95 @@
+import logging
+import queue
+import threading
+import time
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class AudioPipeline:
+    """
+    Hands microphone chunks from the PortAudio callback to a worker thread.
+    The callback only enqueues; VAD and network sends run on the worker, so a
+    slow connection can never stall capture. The queue is bounded: when it is
+    full the oldest chunk is dropped and counted.
+    """
+    def __init__(self, handler, max_chunks=32):
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=max_chunks)
+        self.worker = None
+        self.running = False
+
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.input_overflows = 0
+        self.max_depth = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def push(self, data, overflow=False):
+        """Called from the audio callback. Never blocks."""
+        self.received += 1
+        if overflow:
+            self.input_overflows += 1
+            metrics.increment("audio_input_overflows")
+        item = (data, time.perf_counter())
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            try:
+                self.queue.get_nowait()
+                self._drop()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self._drop()
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _drop(self):
+        self.dropped += 1
+        metrics.increment("audio_chunks_dropped")
+
+    def stop(self):
+        self.running = False
+        if self.worker:
+            self.worker.join(timeout=2.0)
+            self.worker = None
+        while not self.queue.empty():
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "input_overflows": self.input_overflows,
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_depth,
+        }
+
+    def _run(self):
+        while self.running:
+            try:
+                data, pushed_at = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            metrics.observe("pipeline_wait_ms", (time.perf_counter() - pushed_at) * 1000)
+            try:
+                self.handler(data)
+            except Exception as e:
+                logger.error(f"Audio pipeline handler failed: {e}")
+            self.processed += 1
@@ -0,0 +1,24 @@
+import importlib
+
+# Engine name -> (module, class). Modules are only imported when an engine is
+# actually used, so the SDKs of unused engines never load.
+ENGINES = {
+    "deepgram": ("engine.transcriber", "DeepgramTranscriber"),
+    "whisper_live": ("engine.whisper_live_transcriber", "WhisperLiveTranscriber"),
+    # In-process faster-whisper on the CPU, no network at all
+    "local": ("engine.local_transcriber", "LocalWhisperTranscriber"),
+    # Races the engines listed in hedge_engines
+    "hedged": ("engine.hedged", "HedgedTranscriber"),
+}
+
+
+def load_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown transcription engine: {name}")
+    module_name, class_name = ENGINES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_transcriber(name, config_manager, callback):
+    """Builds (but doesn't start) a transcriber for the named engine."""
+    return load_engine(name).from_config(config_manager, callback)
@@ -0,0 +1,63 @@
+import math
+
+import numpy as np
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (in_rate * L / M) with a windowed-sinc
+    low-pass split into L polyphase branches.
+
+    Each call converts one chunk; the last K-1 input samples and the output
+    phase carry over, so chunk boundaries are seamless. All output samples
+    of a chunk are computed at once as a gather plus a row-wise dot product.
+    """
+    def __init__(self, in_rate, out_rate, zero_crossings=8):
+        g = math.gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+
+        factor = max(self.up, self.down)
+        length = 2 * zero_crossings * factor + 1
+        t = np.arange(length) - (length - 1) / 2
+        cutoff = 0.5 / factor
+        h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length, 8.0) * self.up
+        self.taps = math.ceil(length / self.up)
+        h = np.concatenate([h, np.zeros(self.taps * self.up - length)])
+        # phases[p, k] = h[p + k * up]
+        self.phases = h.reshape(self.taps, self.up).T.astype(np.float32)
+        self.delay_ms = (length - 1) / 2 / (in_rate * self.up) * 1000
+
+        self.offsets = np.arange(self.taps)
+        self.reset()
+
+    def reset(self):
+        self.history = np.zeros(self.taps - 1, dtype=np.float32)
+        self.consumed = 0
+        self.next_out = 0
+
+    def process(self, samples):
+        """float32 input samples -> float32 output samples."""
+        total = self.consumed + len(samples)
+        last = ((total - 1) * self.up) // self.down if total else -1
+        x = np.concatenate([self.history, samples])
+        out = np.arange(self.next_out, last + 1, dtype=np.int64)
+
+        position = out * self.down
+        # Index of each output's newest input sample within x
+        newest = position // self.up - self.consumed + self.taps - 1
+        frames = x[newest[:, None] - self.offsets]
+        y = np.einsum("nk,nk->n", frames, self.phases[position % self.up])
+
+        self.history = x[len(x) - (self.taps - 1):]
+        self.consumed = total
+        self.next_out = last + 1
+        return y.astype(np.float32, copy=False)
+
+    def process_int16(self, data):
+        """int16 PCM bytes in, int16 PCM bytes out."""
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        y = self.process(samples)
+        return np.clip(y, -32768, 32767).astype(np.int16).tobytes()
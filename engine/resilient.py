@@ -0,0 +1,179 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import threading
+import time
+
+from engine.event_loop import call_soon, in_loop_thread, submit
+from engine.ring_buffer import AudioRingBuffer
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class ResilientTranscriber:
+    """
+    Keeps one logical transcription session alive across dropped sockets.
+
+    Wraps any engine transcriber behind the same interface. Every chunk given
+    to send_audio is also written to a ring buffer, and engines report how far
+    their delivered finals reach (final_end, seconds of session audio). When
+    the connection drops, a new session is opened with exponential backoff
+    and the audio after the last final is replayed into it: finals already
+    delivered are not repeated and the pending interim is re-recognized.
+    The supervisor is a task on the shared event loop, not a thread.
+    """
+    def __init__(self, factory, callback, buffer_ms=10000, sample_rate=16000,
+                 min_backoff=0.25, max_backoff=8.0, connect_timeout=10.0):
+        # factory(callback) returns a started engine transcriber
+        self.factory = factory
+        self.callback = callback
+        self.buffer = AudioRingBuffer(buffer_ms, sample_rate=sample_rate)
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+
+        self.connection_ready = threading.Event()
+        self.connected_at = None
+        self.lock = threading.Lock()
+        self.wakeup = None
+        self.closing = False
+        self.supervisor = None
+
+        self.session = None
+        self.generation = 0
+        self.opened_at = 0
+        self.live = False
+        # Buffer positions: where the session's audio starts and how far finals reach
+        self.session_start = 0
+        self.confirmed = 0
+        self.reconnects = 0
+
+    def start(self):
+        self._open()
+        self.supervisor = submit(self._supervise())
+
+    def send_audio(self, data):
+        with self.lock:
+            self.buffer.write(data)
+            if not self.live:
+                return
+            if self.session.connection_ready.is_set():
+                self.session.send_audio(data)
+                return
+        # Dropped: the chunk stays buffered, wake the supervisor to reconnect
+        self._wake()
+
+    def keep_alive(self):
+        if self.live:
+            self.session.keep_alive()
+
+    def finalize(self):
+        if self.live:
+            self.session.finalize()
+
+    def is_alive(self):
+        return bool(self.supervisor and not self.supervisor.done())
+
+    def finish(self, timeout=10.0):
+        self._shutdown()
+        if self.live:
+            self.session.finish(timeout=timeout)
+        else:
+            self.session.stop()
+        self.connection_ready.clear()
+
+    def stop(self):
+        self._shutdown()
+        if self.session:
+            self.session.stop()
+        self.connection_ready.clear()
+
+    def _shutdown(self):
+        self.closing = True
+        self._wake()
+        if self.supervisor and not in_loop_thread():
+            concurrent.futures.wait([self.supervisor], timeout=2.0)
+
+    def _wake(self):
+        if self.wakeup:
+            call_soon(self.wakeup.set)
+
+    async def _sleep(self, seconds):
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.wakeup.wait(), seconds)
+        self.wakeup.clear()
+
+    def _open(self):
+        generation = self.generation + 1
+        session = self.factory(lambda text, is_final: self._on_transcript(generation, text, is_final))
+        with self.lock:
+            self.session = session
+            self.generation = generation
+            self.opened_at = time.perf_counter()
+
+    def _on_transcript(self, generation, text, is_final):
+        if generation != self.generation:
+            return
+        final_end = getattr(self.session, "final_end", None)
+        if is_final and final_end is not None:
+            with self.lock:
+                position = self.session_start + self.buffer.ms_to_bytes(final_end * 1000)
+                self.confirmed = max(self.confirmed, position)
+        if self.callback:
+            self.callback(text, is_final)
+
+    def _resume(self, lost_at):
+        """Replays unconfirmed audio into the (connected) current session."""
+        with self.lock:
+            start = max(self.confirmed, self.buffer.oldest)
+            if lost_at is not None:
+                lost_ms = (start - self.confirmed) / self.buffer.bytes_per_ms
+                self.reconnects += 1
+                metrics.increment("reconnects")
+                metrics.increment("audio_lost_ms", lost_ms)
+                metrics.observe("reconnect_ms", (time.perf_counter() - lost_at) * 1000)
+                logger.info(f"Reconnected in {(time.perf_counter() - lost_at) * 1000:.0f} ms, "
+                            f"replaying {(self.buffer.position - start) / self.buffer.bytes_per_ms:.0f} ms, "
+                            f"lost {lost_ms:.0f} ms")
+            self.session_start = start
+            backlog = self.buffer.read(start)
+            if backlog:
+                self.session.send_audio(backlog)
+            self.live = True
+        if self.connected_at is None:
+            self.connected_at = time.time()
+        self.connection_ready.set()
+
+    async def _supervise(self):
+        self.wakeup = asyncio.Event()
+        delay = self.min_backoff
+        lost_at = None
+        while not self.closing:
+            session = self.session
+            if session.connection_ready.is_set():
+                if not self.live:
+                    self._resume(lost_at)
+                    lost_at = None
+                    delay = self.min_backoff
+            elif (self.live or not session.is_alive()
+                  or (lost_at is not None and time.perf_counter() - self.opened_at > self.connect_timeout)):
+                # Dropped, or the new session failed: start over after a pause
+                with self.lock:
+                    self.live = False
+                session.stop()
+                if lost_at is None:
+                    # First attempt right away, then back off
+                    lost_at = time.perf_counter()
+                    logger.warning("Transcriber connection lost, reconnecting...")
+                else:
+                    await self._sleep(delay)
+                    if self.closing:
+                        break
+                    delay = min(delay * 2, self.max_backoff)
+                self._open()
+                if self.closing:
+                    self.session.stop()
+                    break
+                continue
+            await self._sleep(0.1)
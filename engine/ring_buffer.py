@@ -0,0 +1,71 @@
+class AudioRingBuffer:
+    """
+    Fixed-size PCM ring buffer measured in milliseconds.
+    Positions are absolute byte offsets since creation, so a caller can mark
+    a point (e.g. speech onset) and later read everything written after it.
+    The memory is allocated once; when full, the oldest audio is overwritten.
+    """
+    def __init__(self, capacity_ms, sample_rate=16000, sample_width=2):
+        self.sample_width = sample_width
+        self.bytes_per_ms = sample_rate * sample_width / 1000
+        self.capacity = self.ms_to_bytes(capacity_ms)
+        self._buf = bytearray(self.capacity)
+        self._view = memoryview(self._buf)
+        self.position = 0
+        self._floor = 0
+        self.evicted_bytes = 0
+
+    def ms_to_bytes(self, ms):
+        # Always land on a sample boundary
+        n = int(ms * self.bytes_per_ms)
+        return n - n % self.sample_width
+
+    @property
+    def oldest(self):
+        """Absolute position of the oldest byte still held."""
+        return max(self._floor, self.position - self.capacity)
+
+    def __len__(self):
+        return self.position - self.oldest
+
+    def write(self, data):
+        data = memoryview(data).cast("B")
+        n = len(data)
+        before = self.oldest
+        if n > self.capacity:
+            data = data[n - self.capacity:]
+        start = (self.position + n - len(data)) % self.capacity
+        first = min(len(data), self.capacity - start)
+        self._view[start:start + first] = data[:first]
+        self._view[:len(data) - first] = data[first:]
+        self.position += n
+        # Covers both overwritten audio and any part of data that never fit
+        self.evicted_bytes += self.oldest - before
+
+    def position_ms_ago(self, ms):
+        return max(self.oldest, self.position - self.ms_to_bytes(ms))
+
+    def segments(self, start, end=None):
+        """
+        Zero-copy view of [start, end) as at most two memoryviews.
+        A start that was already overwritten is clipped to the oldest byte.
+        """
+        end = self.position if end is None else min(end, self.position)
+        start = max(start, self.oldest)
+        if start >= end:
+            return []
+        a = start % self.capacity
+        b = a + (end - start)
+        if b <= self.capacity:
+            return [self._view[a:b]]
+        return [self._view[a:], self._view[:b - self.capacity]]
+
+    def read(self, start, end=None):
+        """Copies [start, end) into one bytes object, for a single coalesced send."""
+        return b"".join(self.segments(start, end))
+
+    def last(self, ms):
+        return self.read(self.position_ms_ago(ms))
+
+    def clear(self):
+        self._floor = self.position
@@ -0,0 +1,110 @@
+import logging
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SilencePolicy:
+    """
+    What an open session gets while the speaker is silent.
+
+    Only VAD-positive chunks plus hangover_ms after each speech run are
+    streamed. Past that, nothing is sent but a keep-alive every keepalive_s,
+    so the server holds the socket without being sent (and billing) silence.
+    The session closes after an idle timeout that follows the speaker:
+    idle_factor times the 90th percentile of recent pauses that ended in
+    more speech, clamped to [min_idle_s, max_idle_s]. Until a few pauses
+    have been seen the timeout is idle_timeout_s.
+    """
+    MIN_PAUSES = 5
+
+    def __init__(self, hangover_ms=300, keepalive_s=4.0, idle_timeout_s=7.0, min_idle_s=3.0,
+                 max_idle_s=15.0, idle_factor=1.5, history=50, sample_rate=16000):
+        self.hangover_s = hangover_ms / 1000
+        self.keepalive_s = keepalive_s
+        self.default_idle_s = idle_timeout_s
+        self.min_idle_s = min_idle_s
+        self.max_idle_s = max_idle_s
+        self.idle_factor = idle_factor
+        self.history = history
+        self.bytes_per_ms = sample_rate * 2 / 1000
+
+        self.pauses = []
+        self.idle_timeout_s = idle_timeout_s
+        self.last_speech = None
+        self.in_pause = False
+
+        self.opened_at = None
+        self.last_sent = 0
+        self.sent_ms = 0
+
+    @classmethod
+    def from_config(cls, config_manager, sample_rate=16000):
+        return cls(
+            hangover_ms=config_manager.get("silence_hangover_ms", 300),
+            keepalive_s=config_manager.get("keepalive_interval_s", 4.0),
+            idle_timeout_s=config_manager.get("idle_timeout_s", 7.0),
+            min_idle_s=config_manager.get("idle_timeout_min_s", 3.0),
+            max_idle_s=config_manager.get("idle_timeout_max_s", 15.0),
+            sample_rate=sample_rate,
+        )
+
+    def update(self, is_speech, now):
+        """Called for every captured chunk; returns True if it should be streamed."""
+        if is_speech:
+            if self.in_pause:
+                self._record_pause(now - self.last_speech)
+                self.in_pause = False
+            self.last_speech = now
+            return True
+        if self.last_speech is None:
+            return False
+        self.in_pause = True
+        return now - self.last_speech <= self.hangover_s
+
+    def _record_pause(self, pause_s):
+        # Longer gaps are the end of a dictation, not a pause within one
+        if pause_s > self.max_idle_s:
+            return
+        self.pauses.append(pause_s)
+        del self.pauses[:-self.history]
+        if len(self.pauses) >= self.MIN_PAUSES:
+            ordered = sorted(self.pauses)
+            p90 = ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))]
+            self.idle_timeout_s = min(max(p90 * self.idle_factor, self.min_idle_s), self.max_idle_s)
+
+    def is_idle(self, now):
+        return self.last_speech is not None and now - self.last_speech > self.idle_timeout_s
+
+    def open(self, now):
+        self.opened_at = now
+        self.last_sent = now
+        self.sent_ms = 0
+
+    def sent(self, data, now):
+        self.sent_ms += len(data) / self.bytes_per_ms
+        self.last_sent = now
+
+    def keep_alive_due(self, now):
+        if now - self.last_sent >= self.keepalive_s:
+            self.last_sent = now
+            return True
+        return False
+
+    def close(self, now):
+        """Records how much of the time the session was open audio was actually streamed."""
+        # The gap until the next session is not a pause within this one
+        self.last_speech = None
+        self.in_pause = False
+        if self.opened_at is None:
+            return
+        open_s = now - self.opened_at
+        sent_s = self.sent_ms / 1000
+        self.opened_at = None
+        metrics.observe("session_open_s", open_s)
+        metrics.observe("session_audio_sent_s", sent_s)
+        if open_s > 0:
+            metrics.observe("session_audio_ratio", sent_s / open_s)
+        logger.info(f"Session open {open_s:.1f} s, streamed {sent_s:.1f} s of audio "
+                    f"({sent_s / open_s * 100 if open_s > 0 else 0:.0f}%), idle timeout {self.idle_timeout_s:.1f} s")
@@ -1,105 +1,151 @@
-import os
-import threading
-import time
+import asyncio
+import contextlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from deepgram import (
-    DeepgramClient,
+    AsyncDeepgramClient,
+    DeepgramClientEnvironment,
 )
 from deepgram.core.events import EventType
-from deepgram.extensions.types.sockets import ListenV1SocketClientResponse
+from deepgram.extensions.types.sockets import ListenV1ControlMessage, ListenV1SocketClientResponse
+
+from engine.async_transcriber import AsyncTranscriber
+from engine.encoders import create_encoder
+from engine.event_loop import submit
+
+logger = logging.getLogger(__name__)
+
+# Heavy encoders (Opus) run here instead of on the event loop; one worker
+# keeps each session's chunks in order
+ENCODER_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encoder")
+
+class DeepgramTranscriber(AsyncTranscriber):
+    name = "Deepgram"
 
-class DeepgramTranscriber:
     def __init__(self, api_key, config_manager, transcription_callback):
+        super().__init__(transcription_callback)
         self.api_key = api_key
         self.config_manager = config_manager
-        self.callback = transcription_callback
         self.connection = None
-        self.listening_thread = None
-        self.connection_ready = threading.Event()
-        
+        self.encoder = None
+        # An interim is showing that no final has replaced yet
+        self.interim_pending = False
+
         # Map language codes to Deepgram format
         self.language_map = {
             "en": "en",
-            "ru": "russian", 
+            "ru": "russian",
             "ee": "estonian"
         }
 
-    def start(self):
-        # Create Deepgram client with API key
-        self.client = DeepgramClient(api_key=self.api_key)
-
-        def on_message(message: ListenV1SocketClientResponse) -> None:
-            # Log all received messages for debugging
-            msg_type = getattr(message, "type", "Unknown")
-            print(f"[DEBUG] Received Deepgram message type: {msg_type}")
-            
-            if hasattr(message, 'channel') and hasattr(message.channel, 'alternatives'):
-                transcript = message.channel.alternatives[0].transcript
-                is_final = message.is_final if hasattr(message, 'is_final') else False
-                print(f"[DEBUG] Transcript: '{transcript}' (final: {is_final})")
-                if len(transcript) > 0:
-                    self.callback(transcript, is_final)
-            else:
-                print(f"[DEBUG] Message has no channel/alternatives: {message}")
-
-        def on_error(error) -> None:
-            print(f"[ERROR] Deepgram: {error}")
-
-        def on_open(_) -> None:
-            print("[INFO] Deepgram connection opened")
-            self.connection_ready.set()
-
-        def on_close(_) -> None:
-            print("[INFO] Deepgram connection closed")
-            self.connection_ready.clear()
-
-        # Start listening in a separate thread
-        def listening_thread():
+    @classmethod
+    def from_config(cls, config_manager, transcription_callback):
+        return cls(config_manager.get("api_key"), config_manager, transcription_callback)
+
+    def _client(self):
+        url = self.config_manager.get("deepgram_url")
+        if url:
+            # Self-hosted endpoint or a local stand-in (benchmarks)
+            environment = DeepgramClientEnvironment(
+                base=url.replace("ws", "http", 1), production=url, agent=url
+            )
+            return AsyncDeepgramClient(api_key=self.api_key, environment=environment)
+        return AsyncDeepgramClient(api_key=self.api_key)
+
+    def on_message(self, message: ListenV1SocketClientResponse) -> None:
+        # Log all received messages for debugging
+        msg_type = getattr(message, "type", "Unknown")
+        logger.debug("Received Deepgram message type: %s", msg_type)
+
+        if msg_type == "UtteranceEnd":
+            # The server saw a gap in words; make it deliver the open interim as final now
+            logger.debug("Utterance end at %s s", getattr(message, "last_word_end", None))
+            if self.interim_pending:
+                self.finalize()
+        elif hasattr(message, 'channel') and hasattr(message.channel, 'alternatives'):
+            transcript = message.channel.alternatives[0].transcript
+            is_final = message.is_final if hasattr(message, 'is_final') else False
+            if is_final and getattr(message, "duration", None) is not None:
+                self.final_end = message.start + message.duration
+            logger.debug("Transcript: '%s' (final: %s)", transcript, is_final)
+            self.interim_pending = not is_final and len(transcript) > 0
+            if len(transcript) > 0 and self.callback:
+                self.callback(transcript, is_final)
+        else:
+            logger.debug("Message has no channel/alternatives: %s", message)
+
+    @contextlib.asynccontextmanager
+    async def open(self):
+        # Get the proper language code for Deepgram
+        lang_code = self.config_manager.get("language")
+        deepgram_language = self.language_map.get(lang_code, "en")  # Default to English
+
+        logger.debug(f"Using language: {lang_code} -> {deepgram_language}")
+
+        # Encoder state is per stream (Ogg pages, Opus frames)
+        self.encoder = create_encoder(
+            self.config_manager.get("deepgram_encoding", "linear16"),
+            bitrate=self.config_manager.get("opus_bitrate", 24000)
+        )
+
+        # Endpointing: ms of silence before the server finalizes on its own.
+        # UtteranceEnd: sent after this many ms without words. 0 = server default/off.
+        endpointing = {}
+        if self.config_manager.get("deepgram_endpointing_ms"):
+            endpointing["endpointing"] = self.config_manager.get("deepgram_endpointing_ms")
+        if self.config_manager.get("deepgram_utterance_end_ms"):
+            endpointing["utterance_end_ms"] = self.config_manager.get("deepgram_utterance_end_ms")
+
+        # Create a websocket connection to Deepgram
+        async with self._client().listen.v1.connect(
+            model=self.config_manager.get("model"),
+            language=deepgram_language,
+            smart_format=True,
+            interim_results=True,
+            **endpointing,
+            **self.encoder.connect_params()
+        ) as connection:
+            self.connection = connection
+
+            # Set up event handlers
+            connection.on(EventType.MESSAGE, self.on_message)
+            connection.on(EventType.ERROR, lambda error: logger.error(f"Deepgram: {error}"))
+            connection.on(EventType.CLOSE, lambda _: logger.info("Deepgram connection closed"))
+            logger.info("Deepgram connection opened")
             try:
-                # Get the proper language code for Deepgram
-                lang_code = self.config_manager.get("language")
-                deepgram_language = self.language_map.get(lang_code, "en")  # Default to English
-                
-                print(f"[DEBUG] Using language: {lang_code} -> {deepgram_language}")
-                
-                # Create a websocket connection to Deepgram
-                with self.client.listen.v1.connect(
-                    model=self.config_manager.get("model"),
-                    language=deepgram_language,
-                    smart_format=True,
-                    interim_results=True
-                ) as connection:
-                    
-                    self.connection = connection
-                    
-                    # Set up event handlers
-                    connection.on(EventType.OPEN, on_open)
-                    connection.on(EventType.MESSAGE, on_message)
-                    connection.on(EventType.ERROR, on_error)
-                    connection.on(EventType.CLOSE, on_close)
-                    
-                    # Start listening for messages
-                    connection.start_listening()
-                    
-            except Exception as e:
-                print(f"[ERROR] Deepgram listening thread error: {e}")
-
-        self.listening_thread = threading.Thread(target=listening_thread, daemon=True)
-        self.listening_thread.start()
-
-    def send_audio(self, data):
-        # Wait for connection to be ready before sending audio
-        if self.connection_ready.wait(timeout=0.1):  # Wait up to 100ms
-            if self.connection:
-                print(f"[DEBUG] Sending audio chunk: {len(data)} bytes")
-                self.connection.send_media(data)
+                yield
+            finally:
+                self.connection = None
+
+    async def receive(self):
+        # Dispatches messages to the handlers until the server closes the socket
+        await self.connection.start_listening()
+
+    async def send(self, data):
+        if self.encoder.heavy:
+            data = await asyncio.get_running_loop().run_in_executor(ENCODER_EXECUTOR, self.encoder.encode, data)
         else:
-            print("[DEBUG] Connection not ready, skipping audio chunk")
-
-    def stop(self):
-        self.connection_ready.clear()  # Clear the event first
-        if self.connection:
-            self.connection.finish()
-            self.connection = None
-        if self.listening_thread:
-            self.listening_thread.join(timeout=2.0)
-            self.listening_thread = None
+            data = self.encoder.encode(data)
+        if data:
+            await self.connection.send_media(data)
+
+    async def end_utterance(self):
+        # Finalize flushes the results for the audio sent so far; the stream stays open
+        await self._send_control("Finalize")
+
+    async def end_stream(self):
+        tail = self.encoder.flush()
+        if tail:
+            await self.connection.send_media(tail)
+        await self._send_control("CloseStream")
+
+    async def _send_control(self, kind):
+        try:
+            await self.connection.send_control(ListenV1ControlMessage(type=kind))
+        except Exception as e:
+            logger.error(f"Deepgram {kind} failed: {e}")
+
+    def keep_alive(self):
+        """Tells Deepgram to hold the socket open while no audio is sent."""
+        if self.connection_ready.is_set() and self.connection:
+            submit(self._send_control("KeepAlive"))
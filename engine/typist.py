@@ -1,28 +1,143 @@
+import collections
+import logging
+import subprocess
+import sys
+import threading
 import time
-from pynput.keyboard import Controller, Key
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class PynputKeyboard:
+    """Real keystrokes through pynput."""
+    def __init__(self):
+        from pynput.keyboard import Controller, Key
+
+        self.controller = Controller()
+        self.Key = Key
+        # Cmd+V on macOS, Ctrl+V elsewhere
+        self.paste_modifier = Key.cmd if sys.platform == "darwin" else Key.ctrl
+
+    def type(self, text):
+        self.controller.type(text)
+
+    def tap_backspace(self):
+        self.controller.press(self.Key.backspace)
+        self.controller.release(self.Key.backspace)
+
+    def press(self, key):
+        self.controller.press(key)
+
+    def release(self, key):
+        self.controller.release(key)
+
+    def paste(self):
+        self.press(self.paste_modifier)
+        self.press("v")
+        self.release("v")
+        self.release(self.paste_modifier)
+
+class FakeKeyboard:
+    """
+    In-memory keyboard for benchmarks and headless runs.
+    event_delay emulates the per key event cost of the OS input queue.
+    """
+    def __init__(self, clipboard=None, event_delay=0.0):
+        self.clipboard = clipboard
+        self.event_delay = event_delay
+        self.text = ""
+        self.events = 0
+
+    def _event(self, count=1):
+        self.events += count
+        if self.event_delay:
+            time.sleep(self.event_delay * count)
+
+    def type(self, text):
+        self._event(2 * len(text))
+        self.text += text
+
+    def tap_backspace(self):
+        self._event(2)
+        self.text = self.text[:-1]
+
+    def press(self, key):
+        self._event()
+
+    def release(self, key):
+        self._event()
+
+    def paste(self):
+        self._event(4)
+        if self.clipboard:
+            self.text += self.clipboard.get()
+
+class MacClipboard:
+    """System clipboard via pbcopy/pbpaste."""
+    def get(self):
+        return subprocess.run(["pbpaste"], capture_output=True, check=False).stdout.decode("utf-8", "replace")
+
+    def set(self, text):
+        subprocess.run(["pbcopy"], input=text.encode("utf-8"), check=False)
+
+class FakeClipboard:
+    def __init__(self, text=""):
+        self.text = text
+
+    def get(self):
+        return self.text
+
+    def set(self, text):
+        self.text = text
 
 class MacTypist:
     """
-    Handles text insertion on macOS. 
-    Uses a combination of direct typing and clipboard for speed/reliability.
+    Handles text insertion on macOS.
+    Short segments are typed key by key; segments of paste_threshold
+    characters or more go through the clipboard (Cmd+V), restoring whatever
+    the user had copied afterwards.
     """
-    def __init__(self):
-        self.keyboard = Controller()
+    def __init__(self, keyboard=None, clipboard=None, paste_threshold=80,
+                 key_delay=0.002, restore_delay=0.05):
+        self._keyboard = keyboard
+        if clipboard is None and sys.platform == "darwin":
+            clipboard = MacClipboard()
+        self.clipboard = clipboard
+        self.paste_threshold = paste_threshold
+        self.key_delay = key_delay
+        self.restore_delay = restore_delay
+
+    @property
+    def keyboard(self):
+        # pynput is slow to import on macOS, so wait until the first keystroke
+        if self._keyboard is None:
+            self._keyboard = PynputKeyboard()
+        return self._keyboard
 
     def type_text(self, text):
         if not text:
             return
-        
-        # On Mac, sometimes direct typing is more reliable for short segments, 
-        # but clipboard is faster for long ones.
-        # For our live dictation, we'll try direct typing first.
-        self.keyboard.type(text)
+
+        if self.clipboard and self.paste_threshold and len(text) >= self.paste_threshold:
+            self.paste(text)
+        else:
+            self.keyboard.type(text)
+
+    def paste(self, text):
+        saved = self.clipboard.get()
+        self.clipboard.set(text)
+        self.keyboard.paste()
+        # The target app reads the clipboard asynchronously after Cmd+V
+        if self.restore_delay:
+            time.sleep(self.restore_delay)
+        self.clipboard.set(saved)
 
     def backspace(self, count):
         for _ in range(count):
-            self.keyboard.press(Key.backspace)
-            self.keyboard.release(Key.backspace)
-            time.sleep(0.01)
+            self.keyboard.tap_backspace()
+            if self.key_delay:
+                time.sleep(self.key_delay)
 
     def press_combo(self, keys):
         """Presses combinations like Cmd+V"""
@@ -31,3 +146,80 @@ class MacTypist:
             self.keyboard.press(key)
         for key in reversed(keys):
             self.keyboard.release(key)
+
+class QueuedTypist:
+    """
+    Runs a typist on its own thread so transcript callbacks never block on
+    keystrokes. Consecutive queued texts are coalesced into one insertion
+    (which may then cross the paste threshold); backspaces keep their order.
+    """
+    def __init__(self, typist):
+        self.typist = typist
+        self.ops = collections.deque()
+        self.cond = threading.Condition()
+        self.busy = False
+        self.running = True
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def type_text(self, text, metric=None):
+        """metric, if given, records enqueue-to-typed latency under that name."""
+        if text:
+            self._put("type", text, metric)
+
+    def backspace(self, count):
+        if count:
+            self._put("backspace", count)
+
+    def press_combo(self, keys):
+        self._put("combo", keys)
+
+    def wait_idle(self, timeout=None):
+        """Blocks until everything queued so far has been typed."""
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.ops and not self.busy, timeout=timeout)
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.worker.join(timeout=2.0)
+
+    def _put(self, kind, value, metric=None):
+        with self.cond:
+            self.ops.append((kind, value, metric, time.perf_counter()))
+            self.cond.notify_all()
+
+    def _take_batch(self):
+        kind, value, metric, queued_at = self.ops.popleft()
+        timings = [(metric, queued_at)]
+        while self.ops and self.ops[0][0] == kind and kind in ("type", "backspace"):
+            _, more, metric, queued_at = self.ops.popleft()
+            value += more
+            timings.append((metric, queued_at))
+        return kind, value, timings
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.ops or not self.running)
+                if not self.ops:
+                    return
+                kind, value, timings = self._take_batch()
+                self.busy = True
+            try:
+                if kind == "type":
+                    self.typist.type_text(value)
+                elif kind == "backspace":
+                    self.typist.backspace(value)
+                else:
+                    self.typist.press_combo(value)
+            except Exception as e:
+                logger.error(f"Typing failed: {e}")
+            done = time.perf_counter()
+            for metric, queued_at in timings:
+                if metric:
+                    metrics.observe(metric, (done - queued_at) * 1000)
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
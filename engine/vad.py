@@ -1,48 +1,273 @@
+import math
 import numpy as np
-import torch
-from silero_vad import load_silero_vad
 
-class SileroVAD:
-    def __init__(self, threshold=0.5, sample_rate=16000):
-        self.threshold = threshold
+from utils.downloader import download_silero_vad
+from utils.metrics import metrics
+
+class TorchVADBackend:
+    """Silero VAD through the silero_vad package (pulls in PyTorch)."""
+    def __init__(self, sample_rate=16000):
+        try:
+            import torch
+            from silero_vad import load_silero_vad
+        except ImportError as e:
+            raise RuntimeError("The torch VAD backend needs the silero-vad package (pip install silero-vad)") from e
+
+        self.torch = torch
         self.sample_rate = sample_rate
-        
-        # Load the Silero VAD model
         self.model = load_silero_vad()
-        
+
         # Set torch to use single thread for better performance
         torch.set_num_threads(1)
 
-    def is_speech(self, audio_chunk):
+    def reset(self):
+        self.model.reset_states()
+
+    def __call__(self, frames):
+        # Windows are fed to the model one by one: batching them would score
+        # each window as a separate stream and throw away the recurrent state.
+        frames = self.torch.from_numpy(frames)
+        probs = np.empty(len(frames), dtype=np.float32)
+        with self.torch.no_grad():
+            for i in range(len(frames)):
+                probs[i] = self.model(frames[i:i + 1], self.sample_rate).item()
+        return probs
+
+class OnnxVADBackend:
+    """
+    Silero VAD through onnxruntime using the bundled models/silero_vad.onnx.
+    The input window and recurrent state live in buffers allocated once.
+    """
+    CONTEXT_SIZE = 64  # Silero v5 prepends the tail of the previous window
+
+    def __init__(self, sample_rate=16000, window_size=512, model_path=None):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            model_path or download_silero_vad(),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input = np.zeros((1, self.CONTEXT_SIZE + window_size), dtype=np.float32)
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._sr = np.array(sample_rate, dtype=np.int64)
+        self._feed = {"input": self._input, "state": self._state, "sr": self._sr}
+
+    def reset(self):
+        self._input.fill(0)
+        self._state.fill(0)
+
+    def __call__(self, frames):
+        probs = np.empty(len(frames), dtype=np.float32)
+        for i, frame in enumerate(frames):
+            self._input[0, self.CONTEXT_SIZE:] = frame
+            out, state = self.session.run(None, self._feed)
+            self._state[...] = state
+            self._input[0, :self.CONTEXT_SIZE] = frame[-self.CONTEXT_SIZE:]
+            probs[i] = out[0, 0]
+        return probs
+
+class EnergyGate:
+    """
+    Cheap first tier in front of Silero: RMS energy and zero-crossing rate
+    per window, computed for all windows of a chunk at once, against an
+    adaptive noise floor: it starts at the first window, follows drops
+    immediately and rises rise_db_per_s, so it settles on the quietest
+    recent level (speech always has gaps, room noise doesn't).
+
+    closed     energy < floor + margin_db: silence, Silero is skipped
+    open       energy >= floor + open_db and voiced-like ZCR
+    uncertain  anything in between
+    """
+    CLOSED, UNCERTAIN, OPEN = 0, 1, 2
+
+    def __init__(self, margin_db=6.0, open_db=15.0, zcr_max=0.25, rise_db_per_s=3.0,
+                 window_ms=32.0, min_floor_db=-90.0):
+        self.margin_db = margin_db
+        self.open_db = open_db
+        self.zcr_max = zcr_max
+        self.rise_db = rise_db_per_s * window_ms / 1000
+        self.min_floor_db = min_floor_db
+        self.reset()
+
+    def reset(self):
+        self.floor_db = None
+
+    def classify(self, frames):
+        """frames: (n, window) float32 in [-1, 1]. Returns one state per window."""
+        energy_db = 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frames.shape[1] + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+
+        states = np.empty(len(frames), dtype=np.int8)
+        if self.floor_db is None:
+            self.floor_db = max(float(energy_db[0]), self.min_floor_db)
+        for i, e in enumerate(energy_db):
+            above = e - self.floor_db
+            if above < self.margin_db:
+                states[i] = self.CLOSED
+            elif above >= self.open_db and zcr[i] <= self.zcr_max:
+                states[i] = self.OPEN
+            else:
+                states[i] = self.UNCERTAIN
+            self.floor_db = max(e, self.min_floor_db) if e < self.floor_db else self.floor_db + self.rise_db
+        return states
+
+
+VAD_BACKENDS = {
+    "onnx": OnnxVADBackend,
+    "torch": TorchVADBackend,
+}
+
+class SileroVAD:
+    """
+    Streaming Silero VAD.
+    Every 512-sample window of a chunk is scored; samples that don't fill a
+    whole window are carried over to the next call. The speech decision uses
+    hysteresis so short dips don't end an utterance mid-sentence.
+
+    With a pre-gate (EnergyGate), windows it rates closed get probability 0
+    without running the model while no speech is in progress; during speech
+    Silero scores every window so the end of speech stays its decision.
+    """
+    WINDOW_SIZE = 512  # Silero expects exactly 512 samples at 16kHz
+    PRIME_WINDOWS = 16  # skipped windows replayed when the pre-gate reopens
+    GATE_HOLD_WINDOWS = 10  # windows scored after the pre-gate last opened
+
+    def __init__(self, threshold=0.5, sample_rate=16000, stop_threshold=None,
+                 min_speech_ms=64, min_silence_ms=256, backend="onnx", gate=None):
+        self.sample_rate = sample_rate
+        self.gate = gate
+        self.configure(threshold, stop_threshold, min_speech_ms, min_silence_ms)
+
+        if backend not in VAD_BACKENDS:
+            raise ValueError(f"Unknown VAD backend: {backend}")
+        self.backend = VAD_BACKENDS[backend](sample_rate)
+
+        self.reset()
+
+    def configure(self, threshold=0.5, stop_threshold=None, min_speech_ms=64, min_silence_ms=256):
+        """Updates the hysteresis settings; safe to call while streaming."""
+        self.threshold = threshold
+        self.stop_threshold = stop_threshold if stop_threshold is not None else max(threshold - 0.15, 0.01)
+
+        window_ms = self.WINDOW_SIZE * 1000 / self.sample_rate
+        self.min_speech_windows = max(1, math.ceil(min_speech_ms / window_ms))
+        self.min_silence_windows = max(1, math.ceil(min_silence_ms / window_ms))
+
+    def reset(self):
+        """Clears the model's recurrent state and the hysteresis state."""
+        self.backend.reset()
+        if self.gate:
+            self.gate.reset()
+        self._skipped = []
+        self._hold = 0
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self.triggered = False
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def speech_probs(self, audio_chunk):
         """
         audio_chunk: bytes or numpy array (16-bit PCM)
-        Returns: True if speech detected, False otherwise
+        Returns: numpy array with one speech probability per 512-sample window
         """
         # Convert bytes to float32 normalized
         if isinstance(audio_chunk, bytes):
             audio_int16 = np.frombuffer(audio_chunk, dtype=np.int16)
         else:
             audio_int16 = audio_chunk
-            
-        audio_float32 = audio_int16.astype('float32') / 32768.
-        
-        if len(audio_float32) == 0:
-            return False
-
-        # Silero VAD expects exactly 512 samples for 16kHz
-        # If we have more samples, take the first 512
-        expected_samples = 512
-        if len(audio_float32) >= expected_samples:
-            audio_float32 = audio_float32[:expected_samples]
+
+        audio_float32 = audio_int16.astype(np.float32) / 32768.
+        if len(self._remainder):
+            audio_float32 = np.concatenate((self._remainder, audio_float32))
+
+        n_windows = len(audio_float32) // self.WINDOW_SIZE
+        used = n_windows * self.WINDOW_SIZE
+        self._remainder = audio_float32[used:].copy()
+        if n_windows == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        # Frame the whole chunk at once
+        frames = audio_float32[:used].reshape(n_windows, self.WINDOW_SIZE)
+        if self.gate is None:
+            with metrics.timer("vad_inference_ms"):
+                return self.backend(frames)
+        return self._gated_probs(frames)
+
+    def _gated_probs(self, frames):
+        states = self.gate.classify(frames)
+        run = np.empty(len(frames), dtype=bool)
+        for i, state in enumerate(states):
+            # Once open, the gate stays open for a while: Silero builds up
+            # evidence over consecutive windows, quiet syllable gaps included
+            if state != EnergyGate.CLOSED or self.triggered:
+                self._hold = self.GATE_HOLD_WINDOWS
+            run[i] = self._hold > 0
+            self._hold -= 1
+        probs = np.zeros(len(frames), dtype=np.float32)
+        if run.any():
+            # Silero scores a window poorly without the audio before it, so
+            # the last skipped windows are replayed ahead of a reopened gate
+            batch, keep = [], []
+            for frame, scored in zip(frames, run):
+                if not scored:
+                    self._skipped = (self._skipped + [frame])[-self.PRIME_WINDOWS:]
+                    continue
+                batch.extend(self._skipped + [frame])
+                keep.extend([False] * len(self._skipped) + [True])
+                self._skipped = []
+            with metrics.timer("vad_inference_ms"):
+                probs[run] = self.backend(np.stack(batch))[np.array(keep)]
+        else:
+            self._skipped = (self._skipped + list(frames))[-self.PRIME_WINDOWS:]
+
+        # Windows Silero skipped, and how often it agreed with an open/uncertain gate
+        speech = probs >= self.threshold
+        metrics.increment("vad_gate_skipped", int(np.count_nonzero(~run)))
+        for state, name in ((EnergyGate.UNCERTAIN, "uncertain"), (EnergyGate.OPEN, "open")):
+            mask = run & (states == state)
+            metrics.increment(f"vad_gate_{name}", int(np.count_nonzero(mask)))
+            metrics.increment(f"vad_gate_{name}_speech", int(np.count_nonzero(mask & speech)))
+        return probs
+
+    def is_speech(self, audio_chunk):
+        """
+        audio_chunk: bytes or numpy array (16-bit PCM)
+        Returns: True while the detector is in the speech state
+        """
+        for prob in self.speech_probs(audio_chunk):
+            self._update(prob)
+        return self.triggered
+
+    def speech_flags(self, audio_chunk):
+        """
+        audio_chunk: bytes or numpy array (16-bit PCM)
+        Returns: the speech state after each complete 512-sample window
+        """
+        flags = []
+        for prob in self.speech_probs(audio_chunk):
+            self._update(prob)
+            flags.append(self.triggered)
+        return flags
+
+    def _update(self, prob):
+        if self.triggered:
+            if prob < self.stop_threshold:
+                self._silence_run += 1
+                if self._silence_run >= self.min_silence_windows:
+                    self.triggered = False
+                    self._speech_run = 0
+            else:
+                self._silence_run = 0
         else:
-            # If we have fewer samples, pad with zeros
-            audio_float32 = np.pad(audio_float32, (0, expected_samples - len(audio_float32)), 'constant')
-        
-        # Convert to torch tensor and add batch dimension
-        audio_tensor = torch.from_numpy(audio_float32).unsqueeze(0)
-        
-        # Get speech probability from Silero VAD
-        with torch.no_grad():
-            speech_prob = self.model(audio_tensor, self.sample_rate).item()
-        
-        return speech_prob >= self.threshold
+            if prob >= self.threshold:
+                self._speech_run += 1
+                if self._speech_run >= self.min_speech_windows:
+                    self.triggered = True
+                    self._silence_run = 0
+            else:
+                self._speech_run = 0
@@ -1,75 +1,161 @@
-import threading
-import websockets
 import asyncio
+import contextlib
 import json
+import logging
+import time
+
+import numpy as np
+import websockets
+
+from engine.async_transcriber import AsyncTranscriber
+from engine.event_loop import submit
+
+logger = logging.getLogger(__name__)
+
+class SegmentTracker:
+    """
+    Turns WhisperLive's repeated segment lists into incremental results.
+
+    Each update re-sends the last few segments; only completed segments
+    starting at or after the committed end are new finals, and the open
+    segment becomes the interim. Only the committed end time and the last
+    interim are kept, and scanning stops at the first already-committed
+    segment, so the cost per message is O(new segments).
+    """
+    EPSILON = 0.01
+
+    def __init__(self):
+        self.committed_end = 0.0
+        self.interim = ""
+
+    def update(self, segments):
+        """Returns ([(text, end), ...] newly completed, interim text or None)."""
+        new = []
+        for i in range(len(segments) - 1, -1, -1):
+            segment = segments[i]
+            if float(segment["start"]) < self.committed_end - self.EPSILON:
+                break
+            new.append(segment)
+        new.reverse()
+
+        finals = []
+        interim = ""
+        for i, segment in enumerate(new):
+            # Servers without the flag only leave the last segment open
+            completed = segment.get("completed", i < len(new) - 1)
+            text = segment["text"].strip()
+            if completed:
+                self.committed_end = float(segment["end"])
+                if text:
+                    finals.append((text, self.committed_end))
+            else:
+                interim = " ".join(filter(None, (interim, text)))
+
+        if finals:
+            self.interim = ""
+        if interim == self.interim:
+            return finals, None
+        self.interim = interim
+        return finals, interim
 
-class WhisperLiveTranscriber:
-    def __init__(self, host, port, config_manager, transcription_callback):
+
+class WhisperLiveTranscriber(AsyncTranscriber):
+    name = "WhisperLive"
+    # After END_OF_AUDIO, wait until the server has been quiet this long
+    finish_idle = 1.0
+    sample_rate = 16000
+
+    def __init__(self, host, port, config_manager, transcription_callback, frame_ms=100):
+        super().__init__(transcription_callback)
         self.host = host
         self.port = port
         self.config_manager = config_manager
-        self.callback = transcription_callback
         self.websocket = None
-        self.listening_thread = None
-        self.connection_ready = threading.Event()
-        self.loop = None
+        self.last_message_time = 0
+        self.tracker = SegmentTracker()
 
-    def start(self):
-        self.listening_thread = threading.Thread(target=self.run_client, daemon=True)
-        self.listening_thread.start()
+        # WhisperLive takes float32 PCM. Audio is converted straight into one
+        # reused frame and sent once frame_ms has accumulated: larger frames
+        # mean fewer messages, smaller ones lower latency.
+        self.frame = np.empty(int(self.sample_rate * frame_ms / 1000), dtype=np.float32)
+        self.filled = 0
+        # A partial frame doesn't wait longer than a full one would
+        self.idle_flush = frame_ms / 1000
 
-    def run_client(self):
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_until_complete(self.connect_and_listen())
+    @classmethod
+    def from_config(cls, config_manager, transcription_callback):
+        return cls(
+            config_manager.get("whisper_host", "localhost"),
+            config_manager.get("whisper_port", 9090),
+            config_manager,
+            transcription_callback,
+            frame_ms=config_manager.get("whisper_frame_ms", 100)
+        )
 
-    async def connect_and_listen(self):
+    @contextlib.asynccontextmanager
+    async def open(self):
         uri = f"ws://{self.host}:{self.port}"
-        try:
-            async with websockets.connect(uri) as websocket:
-                self.websocket = websocket
-                self.connection_ready.set()
-
-                config = {
-                    "uid": "user",
-                    "language": self.config_manager.get("language"),
-                    "model_size": self.config_manager.get("whisper_model", "small"),
-                    "use_vad": False,
-                }
-                await websocket.send(json.dumps(config))
-
-                while True:
-                    try:
-                        message = await websocket.recv()
-                        data = json.loads(message)
-                        if "segments" in data and data["segments"]:
-                            transcript = " ".join([seg["text"] for seg in data["segments"]])
-                            self.callback(transcript, True)
-                    except websockets.exceptions.ConnectionClosed:
-                        break
-        except Exception as e:
-            print(f"[ERROR] WhisperLive connection failed: {e}")
-        finally:
-            self.websocket = None
-            self.connection_ready.clear()
-
-    def send_audio(self, data):
-        if self.connection_ready.wait(timeout=0.1) and self.websocket and self.loop:
-            future = asyncio.run_coroutine_threadsafe(self.websocket.send(data), self.loop)
+        async with websockets.connect(uri) as websocket:
+            self.websocket = websocket
+            config = {
+                "uid": "user",
+                "language": self.config_manager.get("language"),
+                "model_size": self.config_manager.get("whisper_model", "small"),
+                "use_vad": self.config_manager.get("whisper_use_vad", True),
+                "send_last_n_segments": self.config_manager.get("whisper_send_last_n_segments", 10),
+            }
+            await websocket.send(json.dumps(config))
             try:
-                future.result(timeout=1)
-            except Exception as e:
-                print(f"[ERROR] WhisperLive send_audio failed: {e}")
-        else:
-            print("[DEBUG] WhisperLive connection not ready, skipping audio chunk")
-
-    def stop(self):
-        if self.websocket and self.loop:
-            future = asyncio.run_coroutine_threadsafe(self.websocket.close(), self.loop)
+                yield
+            finally:
+                self.websocket = None
+
+    async def receive(self):
+        while True:
             try:
-                future.result(timeout=1)
-            except Exception as e:
-                print(f"[ERROR] WhisperLive stop failed: {e}")
-        if self.listening_thread:
-            self.listening_thread.join(timeout=2.0)
-            self.listening_thread = None
+                message = await self.websocket.recv()
+            except websockets.exceptions.ConnectionClosed:
+                break
+            self.last_message_time = time.time()
+            data = json.loads(message)
+            if data.get("segments"):
+                finals, interim = self.tracker.update(data["segments"])
+                for text, end in finals:
+                    self.final_end = end
+                    self.callback(text, True)
+                if interim:
+                    self.callback(interim, False)
+
+    async def send(self, data):
+        samples = np.frombuffer(data, dtype=np.int16)
+        while len(samples):
+            n = min(len(samples), len(self.frame) - self.filled)
+            np.multiply(samples[:n], np.float32(1 / 32768), out=self.frame[self.filled:self.filled + n])
+            self.filled += n
+            samples = samples[n:]
+            if self.filled == len(self.frame):
+                await self.flush()
+
+    async def flush(self):
+        if self.filled:
+            await self.websocket.send(self.frame[:self.filled].tobytes())
+            self.filled = 0
+
+    def keep_alive(self):
+        """WhisperLive has no keep-alive message; a WebSocket ping stands in for it."""
+        if self.connection_ready.is_set() and self.websocket:
+            submit(self._ping(self.websocket))
+
+    async def _ping(self, websocket):
+        try:
+            await websocket.ping()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def end_stream(self):
+        """Signals end of audio and closes once the last segments have arrived."""
+        await self.websocket.send(b"END_OF_AUDIO")
+        start = time.time()
+        while time.time() - max(self.last_message_time, start) < self.finish_idle:
+            await asyncio.sleep(0.05)
+        await self.websocket.close()
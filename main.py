@@ -1,47 +1,115 @@
+import time
+START_TIME = time.perf_counter()
+
+import logging
 import sys
 import threading
-import pystray
-import pyaudio
-import time
-from PIL import Image, ImageDraw
 import os
-from PySide6.QtWidgets import QApplication
 
+# Only light modules are imported up front. Qt, the VAD model, PortAudio and
+# the transcription SDKs load after the tray icon is visible (see warm_up);
+# the tray itself loads in run(), so the app also runs headless (daemon.py).
 from utils.config import ConfigManager
 from utils.filters import TextProcessor
-from ui.settings_window import SettingsWindow
 from engine.audio import AudioStreamer
-from engine.transcriber import DeepgramTranscriber
-from engine.whisper_live_transcriber import WhisperLiveTranscriber
-from engine.typist import MacTypist
-from engine.vad import SileroVAD
+from engine.registry import create_transcriber, load_engine
+from engine.typist import MacTypist, QueuedTypist
+from engine.live_typist import LiveTypist
+from engine.pipeline import AudioPipeline
+from engine.ring_buffer import AudioRingBuffer
+from engine.resilient import ResilientTranscriber
+from engine.silence_policy import SilencePolicy
+from utils.log import setup_logging
+from utils.metrics import metrics, start_http_server, start_json_dump
 
-from collections import deque
+logger = logging.getLogger(__name__)
 
 class RuttuApp:
-    def __init__(self):
-        self.config = ConfigManager(os.path.join(os.path.dirname(__file__), "config.json"))
+    def __init__(self, config_path=None, typist=None, typing=True):
+        self.config = ConfigManager(config_path or os.path.join(os.path.dirname(__file__), "config.json"))
+        setup_logging(self.config.get("log_level"), self.config.get("log_format"))
         self.processor = TextProcessor(self.config)
-        self.typist = MacTypist()
-        self.audio = AudioStreamer()
+        self.typist = typist or QueuedTypist(MacTypist(paste_threshold=self.config.get("paste_threshold")))
+        self.live_typist = LiveTypist(self.typist, self.config.get("live_typing_interval_ms"))
+        self.live_typing = self.config.get("live_typing")
+        # Headless: transcripts only go to the listeners (daemon subscribers)
+        self.typing = typing
+        self.listeners = []
+        self.server = None
+        self.audio = AudioStreamer(chunk=self.config.get("audio_chunk"), device_rate=self.config.get("audio_device_rate"))
         self.vad = None
+
+        self.chunk_ms = self.audio.chunk * 1000 / self.audio.rate
+        self.pipeline = AudioPipeline(
+            self.process_audio,
+            max_chunks=max(4, int(self.config.get("audio_queue_ms") / self.chunk_ms))
+        )
         
-        self.qt_app = QApplication(sys.argv)
-        self.qt_app.setQuitOnLastWindowClosed(False)
-        
+        self.qt_app = None
+        self.ready = threading.Event()
+        self.init_lock = threading.Lock()
+        self.exit_when_ready = "--startup-benchmark" in sys.argv
+
         self.recording_active = False
         self.icon = None
         self.settings_window = None
         self.transcriber = None
+        self.deepgram_pool = None
+        self.speech_onset_time = None
+        self.first_transcript_logged = False
+        self.pending_latencies = set()
         
-        self.last_speech_time = 0
-        self.connection_timeout = 7.0
+        # Streams speech plus a hangover, keep-alives in between, and closes
+        # the session after an idle timeout learned from the speaker's pauses
+        self.silence = SilencePolicy.from_config(self.config, sample_rate=self.audio.rate)
+        # Finalize on the VAD's end of speech instead of waiting for server endpointing
+        self.vad_finalize = self.config.get("vad_finalize")
+        self.was_streaming = False
+        self.was_speech = False
+        # Set from other threads; the pipeline worker closes the session on its next chunk
+        self.restart_requested = False
+        self.speech_end_time = None
+        self.connect_timeout = 5.0
         self.is_connected = False
         
-        self.pre_roll = deque(maxlen=4)
-        self.pending_audio = []
+        # Every captured chunk lands here; on speech onset the lookback plus
+        # everything captured while connecting is replayed in one send
+        self.audio_buffer = AudioRingBuffer(self.config.get("audio_buffer_ms"), sample_rate=self.audio.rate)
+        self.pre_roll_ms = self.config.get("pre_roll_ms")
+        self.backlog_start = None
+
+        # React to settings changes instead of polling config in hot paths
+        self.config.subscribe(self.on_config_change)
+        self.start_metrics()
+
+    def start_metrics(self):
+        port = self.config.get("metrics_port")
+        if port:
+            try:
+                start_http_server(port)
+                logger.info(f"Metrics served on http://127.0.0.1:{port}/metrics")
+            except OSError as e:
+                logger.error(f"Failed to start metrics server: {e}")
+        if self.config.get("metrics_dump_path"):
+            start_json_dump(self.config.get("metrics_dump_path"), self.config.get("metrics_dump_interval"))
+
+    def start_server(self, socket_path=None, port=None):
+        """Serves transcripts to local clients when a socket or port is configured."""
+        if self.server:
+            return
+        from engine.daemon import DictationServer
+        server = DictationServer.from_config(self.config, socket_path, port)
+        if not (server.socket_path or server.port):
+            return
+        try:
+            self.server = server.start()
+        except OSError as e:
+            logger.error(f"Failed to start transcript server: {e}")
+            return
+        self.listeners.append(self.server.publish)
 
     def create_icon_image(self, color):
+        from PIL import Image, ImageDraw
         width, height = 64, 64
         image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
         draw = ImageDraw.Draw(image)
@@ -51,6 +119,7 @@ class RuttuApp:
 
     def on_settings(self):
         if not self.settings_window:
+            from ui.settings_window import SettingsWindow
             self.settings_window = SettingsWindow(self.config)
         self.settings_window.show()
         self.settings_window.raise_()
@@ -67,84 +136,229 @@ class RuttuApp:
         if self.icon:
             self.icon.icon = self.create_icon_image(color)
 
+    def vad_settings(self):
+        return {
+            "threshold": self.config.get("vad_start_threshold"),
+            "stop_threshold": self.config.get("vad_stop_threshold"),
+            "min_speech_ms": self.config.get("vad_min_speech_ms"),
+            "min_silence_ms": self.config.get("vad_min_silence_ms"),
+        }
+
+    def vad_gate(self):
+        """Energy/ZCR pre-gate that spares Silero the silent windows, or None."""
+        if not self.config.get("vad_pregate"):
+            return None
+        from engine.vad import EnergyGate
+        return EnergyGate(margin_db=self.config.get("vad_gate_margin_db"), open_db=self.config.get("vad_gate_open_db"))
+
+    def on_config_change(self, changes):
+        if self.deepgram_pool and changes.keys() & {"api_key", "language", "model", "deepgram_url", "deepgram_encoding",
+                                                     "deepgram_endpointing_ms", "deepgram_utterance_end_ms"}:
+            self.deepgram_pool.recycle()
+        if self.vad and any(k.startswith("vad_") for k in changes):
+            self.vad.configure(**self.vad_settings())
+        if self.vad and changes.keys() & {"vad_pregate", "vad_gate_margin_db", "vad_gate_open_db"}:
+            self.vad.gate = self.vad_gate()
+        if "vad_finalize" in changes:
+            self.vad_finalize = changes["vad_finalize"]
+        if "live_typing" in changes:
+            self.live_typing = changes["live_typing"]
+        if "paste_threshold" in changes:
+            self.typist.typist.paste_threshold = changes["paste_threshold"]
+
     def on_transcription(self, text, is_final):
+        if self.speech_onset_time:
+            elapsed_ms = (time.time() - self.speech_onset_time) * 1000
+            if not self.first_transcript_logged:
+                self.first_transcript_logged = True
+                logger.info(f"Time to first transcript: {elapsed_ms:.0f} ms")
+            latency = "onset_to_first_final_ms" if is_final else "onset_to_first_interim_ms"
+            if latency in self.pending_latencies:
+                self.pending_latencies.discard(latency)
+                metrics.observe(latency, elapsed_ms)
+
+        if is_final and self.speech_end_time:
+            metrics.observe("speech_end_to_final_ms", (time.time() - self.speech_end_time) * 1000)
+            self.speech_end_time = None
+
         processed = self.processor.process_segment(text, is_final)
         if processed:
-            print(f"[LIVE] {processed} (final={is_final})")
+            logger.debug("Transcript: %s (final=%s)", processed, is_final)
+            for listener in self.listeners:
+                listener(processed, is_final)
+        if not self.typing:
+            return
+
+        if self.live_typing:
             if is_final:
-                self.typist.type_text(processed + " ")
+                self.live_typist.commit(processed + " " if processed else "")
+            else:
+                self.live_typist.update(processed or "")
+        elif processed and is_final:
+            self.typist.type_text(processed + " ", metric="final_to_typed_ms")
 
     def start_transcriber(self):
         if not self.transcriber:
             engine = self.config.get("transcription_engine", "deepgram")
-            print(f"[INFO] VAD Triggered! Connecting to {engine}...")
-
-            if engine == "deepgram":
-                self.transcriber = DeepgramTranscriber(
-                    self.config.get("api_key"),
-                    self.config,
-                    self.on_transcription
-                )
-            elif engine == "whisper_live":
-                self.transcriber = WhisperLiveTranscriber(
-                    self.config.get("whisper_host", "localhost"),
-                    self.config.get("whisper_port", 9090),
-                    self.config,
-                    self.on_transcription
-                )
-
-            if self.transcriber:
-                self.transcriber.start()
-                if self.transcriber.connection_ready.wait(timeout=5):
-                    print(f"[INFO] Connection to {engine} established.")
-                    self.is_connected = True
-                    self.update_icon()
-
-                    for chunk in self.pre_roll:
-                        self.transcriber.send_audio(chunk)
-
-                    for chunk in self.pending_audio:
-                        self.transcriber.send_audio(chunk)
-                    self.pending_audio = []
-                else:
-                    print(f"[ERROR] Connection to {engine} timed out.")
-                    self.stop_transcriber()
+            logger.info(f"VAD Triggered! Connecting to {engine}...")
+            self.speech_onset_time = time.time()
+            self.silence.open(self.speech_onset_time)
+            self.first_transcript_logged = False
+            self.pending_latencies = {"onset_to_first_interim_ms", "onset_to_first_final_ms"}
+
+            try:
+                load_engine(engine)
+            except ValueError as e:
+                logger.error(f"{e}")
+                return
+
+            if engine == "deepgram" and self.deepgram_pool:
+                # The pool hands over an already started (usually connected) session
+                open_session = self.deepgram_pool.acquire
+            else:
+                open_session = lambda callback: self.open_session(engine, callback)
+            # Reconnects on its own and replays audio that wasn't finalized yet
+            self.transcriber = ResilientTranscriber(
+                open_session,
+                self.on_transcription,
+                buffer_ms=self.config.get("reconnect_buffer_ms"),
+                sample_rate=self.audio.rate
+            )
+            # Non-blocking: the session connects on the shared event loop and
+            # check_connection picks it up on a later chunk
+            self.transcriber.start()
+
+    def check_connection(self):
+        engine = self.config.get("transcription_engine", "deepgram")
+        if self.transcriber.connection_ready.is_set():
+            connect_ms = (self.transcriber.connected_at - self.speech_onset_time) * 1000
+            metrics.observe("connect_ms", connect_ms)
+            logger.info(f"Connection to {engine} established in {connect_ms:.0f} ms.")
+            self.is_connected = True
+            self.update_icon()
+        elif time.time() - self.speech_onset_time > self.connect_timeout:
+            logger.error(f"Connection to {engine} timed out.")
+            self.stop_transcriber()
+
+    def open_session(self, engine, callback):
+        transcriber = create_transcriber(engine, self.config, callback)
+        transcriber.start()
+        return transcriber
 
     def stop_transcriber(self):
         if self.transcriber:
-            print("[INFO] Silence detected. Closing connection.")
+            logger.info("Silence detected. Closing connection.")
             self.transcriber.stop()
             self.transcriber = None
+            self.silence.close(time.time())
             self.is_connected = False
-            self.pending_audio = []
+            self.was_streaming = False
+            self.backlog_start = None
+            self.live_typist.reset()
+            if self.vad:
+                self.vad.reset()
             self.update_icon()
 
-    def audio_callback(self, in_data, frame_count, time_info, status):
+    def stop_pool(self):
+        if self.deepgram_pool:
+            logger.info(f"Deepgram handovers: {self.deepgram_pool.warm_handovers} warm, "
+                  f"{self.deepgram_pool.cold_handovers} cold")
+            self.deepgram_pool.stop()
+            self.deepgram_pool = None
+
+    def audio_callback(self, in_data, overflow):
+        # Runs on the PortAudio thread: only hand the chunk over, never block
+        if self.recording_active:
+            self.pipeline.push(in_data, overflow=overflow)
+
+    def process_audio(self, in_data):
         if not self.recording_active:
-            return (None, pyaudio.paContinue)
-            
+            return
+        if self.restart_requested:
+            self.restart_requested = False
+            self.stop_transcriber()
+
+        self.audio_buffer.write(in_data)
         is_speech = self.vad and self.vad.is_speech(in_data)
-        
+        now = time.time()
+        stream = self.silence.update(is_speech, now)
+        if self.was_speech and not is_speech:
+            # The VAD reports the end only after min_silence_ms of silence
+            self.speech_end_time = now - self.config.get("vad_min_silence_ms", 256) / 1000
+        elif is_speech and not self.was_speech:
+            self.speech_end_time = None
+        self.was_speech = is_speech
+
         if is_speech:
-            self.last_speech_time = time.time()
-            if not self.is_connected and not self.transcriber:
-                self.pending_audio.append(in_data)
-                if len(self.pending_audio) == 1:
-                    threading.Thread(target=self.start_transcriber, daemon=True).start()
-            elif self.is_connected and self.transcriber:
+            if not self.transcriber and self.backlog_start is None:
+                self.backlog_start = self.audio_buffer.position_ms_ago(self.pre_roll_ms + self.chunk_ms)
+                self.start_transcriber()
+
+        if self.transcriber and not self.is_connected:
+            self.check_connection()
+
+        if self.is_connected and self.transcriber:
+            if self.backlog_start is not None:
+                self.flush_backlog()
+                self.was_streaming = True
+            elif stream:
                 self.transcriber.send_audio(in_data)
-        else:
-            self.pre_roll.append(in_data)
-            
-            if self.is_connected and (time.time() - self.last_speech_time > self.connection_timeout):
-                self.stop_transcriber()
-                
-        return (None, pyaudio.paContinue)
+                self.silence.sent(in_data, now)
+                self.was_streaming = True
+            else:
+                # Finalize once the hangover is over, so it covers the trailing audio too
+                if self.was_streaming and self.vad_finalize:
+                    self.transcriber.finalize()
+                self.was_streaming = False
+                if self.silence.keep_alive_due(now):
+                    self.transcriber.keep_alive()
+
+        if not is_speech and self.is_connected and self.silence.is_idle(now):
+            self.stop_transcriber()
+
+    def flush_backlog(self):
+        if self.backlog_start < self.audio_buffer.oldest:
+            lost_ms = (self.audio_buffer.oldest - self.backlog_start) / self.audio_buffer.bytes_per_ms
+            logger.warning(f"Connect took longer than the audio buffer, lost {lost_ms:.0f} ms")
+        backlog = self.audio_buffer.read(self.backlog_start)
+        self.backlog_start = None
+        self.transcriber.send_audio(backlog)
+        self.silence.sent(backlog, time.time())
+
+    def ensure_vad(self):
+        with self.init_lock:
+            if not self.vad:
+                from engine.vad import SileroVAD
+                self.vad = SileroVAD(backend=self.config.get("vad_backend"), gate=self.vad_gate(), **self.vad_settings())
+
+    def warm_up(self):
+        """Loads the heavy subsystems in the background once the tray icon is up."""
+        try:
+            engine_cls = load_engine(self.config.get("transcription_engine", "deepgram"))
+            # Engines with a local model load it here, not at speech onset
+            if hasattr(engine_cls, "preload"):
+                engine_cls.preload(self.config)
+            self.ensure_vad()
+            self.audio.warm_up()
+            # Touching the keyboard imports pynput and creates the controller
+            if self.typing:
+                self.typist.typist.keyboard
+        except Exception as e:
+            logger.error(f"Background initialization failed: {e}")
+        self.ready.set()
+        logger.info(f"Ready for dictation {(time.perf_counter() - START_TIME) * 1000:.0f} ms after launch")
+        if self.exit_when_ready:
+            self.on_exit()
+
+    def on_icon_ready(self, icon):
+        icon.visible = True
+        logger.info(f"Tray icon shown {(time.perf_counter() - START_TIME) * 1000:.0f} ms after launch")
+        threading.Thread(target=self.warm_up, daemon=True).start()
 
     def toggle_dictation(self):
         engine = self.config.get("transcription_engine", "deepgram")
         if engine == "deepgram" and not self.config.get("api_key"):
-            print("[ERROR] No API Key set in settings!")
+            logger.error("No API Key set in settings!")
             self.on_settings()
             return
 
@@ -152,31 +366,69 @@ class RuttuApp:
         self.update_icon()
         
         if self.recording_active:
-            print("[INFO] App active. VAD monitoring started.")
-            if not self.vad:
-                self.vad = SileroVAD()
-            self.audio.start(self.audio_callback)
+            logger.info("App active. VAD monitoring started.")
+            if not self.ready.is_set():
+                logger.info("Waiting for background initialization...")
+                self.ready.wait()
+            self.start_monitoring()
         else:
-            self.audio.stop()
-            self.stop_transcriber()
-            print("[INFO] Dictation stopped.")
+            self.stop_monitoring()
+            logger.info(f"Audio pipeline stats: {self.pipeline.stats()}")
+            logger.info(f"Latency: {metrics.snapshot()['histograms']}")
+            logger.info("Dictation stopped.")
+
+    def start_monitoring(self, capture=True):
+        """
+        Starts VAD monitoring. With capture=False the microphone stays closed
+        and the caller feeds audio_callback itself (replay benchmarks).
+        """
+        self.recording_active = True
+        self.ensure_vad()
+        self.vad.reset()
+        self.audio_buffer.clear()
+        if self.config.get("transcription_engine", "deepgram") == "deepgram" and self.config.get("deepgram_prewarm"):
+            if not self.deepgram_pool:
+                from engine.connection_pool import DeepgramConnectionPool
+                self.deepgram_pool = DeepgramConnectionPool(self.config)
+            self.deepgram_pool.start()
+        self.pipeline.start()
+        if capture:
+            self.audio.start(self.audio_callback)
+            metrics.observe("capture_latency_ms", self.audio.capture_latency_ms)
+
+    def stop_monitoring(self):
+        self.recording_active = False
+        self.audio.stop()
+        self.pipeline.stop()
+        self.stop_transcriber()
+        self.stop_pool()
 
     def on_exit(self):
         self.audio.stop()
+        self.pipeline.stop()
         self.stop_transcriber()
+        self.stop_pool()
+        self.typist.stop()
+        if self.server:
+            self.server.stop()
+        self.config.flush()
         if self.icon: self.icon.stop()
-        self.qt_app.quit()
+        if self.qt_app: self.qt_app.quit()
         sys.exit(0)
 
     def set_language(self, lang):
         def inner():
             self.config.set("language", lang)
-            print(f"[INFO] Language changed to: {lang}")
+            logger.info(f"Language changed to: {lang}")
             if self.is_connected:
-                self.stop_transcriber()
+                # The pipeline worker owns the session and the VAD state: let it reconnect
+                self.restart_requested = True
         return inner
 
     def run(self):
+        import pystray
+        self.start_server()
+
         lang_menu = pystray.Menu(
             pystray.MenuItem("🇪🇪 Estonian", self.set_language("ee"), 
                              checked=lambda item: self.config.get("language") == "ee", radio=True),
@@ -196,9 +448,12 @@ class RuttuApp:
         
         self.icon = pystray.Icon("ruttu", self.create_icon_image("#555555"), "ruttu.ee", menu)
         
-        icon_thread = threading.Thread(target=self.icon.run, daemon=True)
+        icon_thread = threading.Thread(target=self.icon.run, args=(self.on_icon_ready,), daemon=True)
         icon_thread.start()
-        
+
+        from PySide6.QtWidgets import QApplication
+        self.qt_app = QApplication(sys.argv)
+        self.qt_app.setQuitOnLastWindowClosed(False)
         sys.exit(self.qt_app.exec())
 
 if __name__ == "__main__":
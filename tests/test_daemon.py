@@ -0,0 +1,111 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import websockets
+from websockets.sync.client import connect
+
+import engine.daemon as daemon
+from engine.daemon import DictationServer, PushSession, SessionConfig
+
+
+class FakeEngine:
+    def __init__(self, callback):
+        self.callback = callback
+        self.connection_ready = threading.Event()
+        self.chunks = []
+
+    def start(self):
+        self.connection_ready.set()
+
+    def send_audio(self, data, wait=False):
+        self.chunks.append(data)
+
+    def is_alive(self):
+        return True
+
+    def finish(self, timeout=10.0):
+        self.connection_ready.clear()
+
+    def stop(self):
+        self.connection_ready.clear()
+
+
+class FakeConfig:
+    def get(self, key, default=None):
+        return default
+
+    def subscribe(self, callback, keys=None):
+        pass
+
+
+def test_push_sends_whole_samples_only(monkeypatch):
+    engines = []
+
+    def create_transcriber(name, config, callback):
+        engines.append(FakeEngine(callback))
+        return engines[-1]
+
+    monkeypatch.setattr(daemon, "create_transcriber", create_transcriber)
+    server = DictationServer(FakeConfig(), max_ahead_ms=60000)
+    session = PushSession(server, None, "fake", SessionConfig(FakeConfig(), {}))
+    frames = [bytes([i % 256]) * 3201 for i in range(5)]
+
+    async def push_all():
+        for frame in frames:
+            await session.push(frame)
+
+    asyncio.run(push_all())
+    deadline = time.time() + 2
+    while time.time() < deadline and sum(map(len, engines[0].chunks)) < 16004:
+        time.sleep(0.01)
+    session.transcriber.stop()
+
+    assert all(len(chunk) % 2 == 0 for chunk in engines[0].chunks)
+    assert b"".join(engines[0].chunks) == b"".join(frames)[:16004]
+    assert session.carry == b"\x04"
+    assert len(engines) == 1
+
+
+def test_tcp_listener_refuses_browser_origins():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = DictationServer(FakeConfig(), port=port).start()
+    try:
+        with pytest.raises(websockets.exceptions.InvalidStatus):
+            with connect(f"ws://127.0.0.1:{server.port}", origin="https://example.com"):
+                pass
+        with connect(f"ws://127.0.0.1:{server.port}"):
+            pass
+    finally:
+        server.stop()
+
+
+def test_stream_transcripts_go_through_text_processor(monkeypatch):
+    engines = []
+
+    def create_transcriber(name, config, callback):
+        engines.append(FakeEngine(callback))
+        return engines[-1]
+
+    class Config(FakeConfig):
+        def get(self, key, default=None):
+            return {"exclusions": ["thank you"], "commands": {"new line": "\n"}}.get(key, default)
+
+    offered = []
+    monkeypatch.setattr(daemon, "create_transcriber", create_transcriber)
+    monkeypatch.setattr(daemon, "call_soon", lambda callback, *args: callback(*args))
+    client = type("Client", (), {"offer": staticmethod(offered.append)})
+    server = DictationServer(Config())
+    session = PushSession(server, client, "fake", SessionConfig(Config(), {}))
+    deadline = time.time() + 2
+    while time.time() < deadline and not session.transcriber.connection_ready.is_set():
+        time.sleep(0.01)
+    engines[0].callback("Thank you.", True)
+    engines[0].callback("first new line second", True)
+    session.transcriber.stop()
+
+    assert [m["text"] for m in offered] == ["first\nsecond"]
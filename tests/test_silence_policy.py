@@ -0,0 +1,36 @@
+from engine.silence_policy import SilencePolicy
+
+
+def speak(policy, start, seconds, step=0.032):
+    now = start
+    while now < start + seconds:
+        policy.update(True, now)
+        now += step
+    return now
+
+
+def test_gaps_between_sessions_are_not_pauses():
+    policy = SilencePolicy(idle_timeout_s=7.0)
+    now = 0.0
+    for _ in range(8):
+        policy.open(now)
+        now = speak(policy, now, 2.0)
+        policy.update(False, now)
+        now += 7.5
+        assert policy.is_idle(now)
+        policy.close(now)
+        now += 2.5
+    assert policy.pauses == []
+    assert policy.idle_timeout_s == 7.0
+
+
+def test_pauses_within_a_session_adapt_the_timeout():
+    policy = SilencePolicy(idle_timeout_s=7.0, min_idle_s=3.0)
+    now = 0.0
+    policy.open(now)
+    for _ in range(6):
+        now = speak(policy, now, 1.0)
+        policy.update(False, now)
+        now += 1.0
+    assert len(policy.pauses) == 5
+    assert policy.idle_timeout_s == 3.0
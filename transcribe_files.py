@@ -0,0 +1,199 @@
+"""
+Headless batch transcription of recorded audio through the live pipeline.
+
+Usage:
+    python transcribe_files.py recordings/ call.wav -o transcripts.jsonl
+    python transcribe_files.py backlog/ --engine whisper_live --concurrency 8
+
+Files are memory-mapped, segmented with SileroVAD and the speech segments
+are transcribed concurrently (one transcriber session per segment). Finals
+go through TextProcessor and are written as JSONL with file-relative
+timestamps. Inputs must be 16 kHz mono 16-bit WAV or headerless PCM.
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.config import ConfigManager
+from utils.filters import TextProcessor
+from engine.registry import create_transcriber
+from engine.vad import SileroVAD
+from utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+AUDIO_EXTENSIONS = (".wav", ".pcm", ".raw")
+
+
+def find_audio_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+def wav_data_range(buf):
+    """Returns (offset, size) of the PCM data in a RIFF/WAVE buffer."""
+    if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    pos = 12
+    fmt = None
+    while pos + 8 <= len(buf):
+        chunk_id = buf[pos:pos + 4]
+        size = struct.unpack("<I", buf[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", buf[pos + 8:pos + 24])
+        elif chunk_id == b"data":
+            if fmt is None or fmt[0] != 1 or fmt[1] != 1 or fmt[2] != SAMPLE_RATE or fmt[5] != 16:
+                raise ValueError("expected 16 kHz mono 16-bit PCM")
+            return pos + 8, min(size, len(buf) - pos - 8)
+        pos += 8 + size + (size & 1)
+    raise ValueError("no data chunk")
+
+
+def open_pcm(path):
+    """Memory-maps the file and returns its samples as an int16 array (no copy)."""
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    offset, size = 0, len(buf)
+    if path.lower().endswith(".wav"):
+        offset, size = wav_data_range(buf)
+    return np.frombuffer(buf, dtype=np.int16, count=size // 2, offset=offset)
+
+
+def find_speech_segments(samples, vad, pad_ms=300, merge_ms=500, chunk=4096):
+    """Streams samples through the VAD and returns padded (start, end) sample ranges."""
+    vad.reset()
+    raw = []
+    start = None
+    index = 0
+    for offset in range(0, len(samples), chunk):
+        for flag in vad.speech_flags(samples[offset:offset + chunk]):
+            if flag and start is None:
+                start = index * vad.WINDOW_SIZE
+            elif not flag and start is not None:
+                raw.append((start, index * vad.WINDOW_SIZE))
+                start = None
+            index += 1
+    if start is not None:
+        raw.append((start, len(samples)))
+
+    pad = pad_ms * SAMPLE_RATE // 1000
+    merge = merge_ms * SAMPLE_RATE // 1000
+    segments = []
+    for s, e in raw:
+        s, e = max(0, s - pad), min(len(samples), e + pad)
+        if segments and s - segments[-1][1] <= merge:
+            segments[-1] = (segments[-1][0], e)
+        else:
+            segments.append((s, e))
+    return segments
+
+
+def transcribe_segment(config, engine, processor, audio, send_ms=100, timeout=30.0):
+    finals = []
+
+    def on_transcript(text, is_final):
+        if is_final:
+            processed = processor.process_segment(text, True)
+            if processed:
+                finals.append(processed)
+
+    transcriber = create_transcriber(engine, config, on_transcript)
+    transcriber.start()
+    if not transcriber.connection_ready.wait(timeout=10):
+        transcriber.stop()
+        raise TimeoutError(f"connection to {engine} timed out")
+
+    # Faster than real time: no pacing, the send queue provides backpressure
+    step = send_ms * SAMPLE_RATE // 1000
+    for i in range(0, len(audio), step):
+        transcriber.send_audio(audio[i:i + step].tobytes(), wait=True)
+    transcriber.finish(timeout=timeout)
+    return " ".join(finals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+", help="audio files or directories")
+    parser.add_argument("-o", "--output", default="transcripts.jsonl", help="JSONL output path, - for stdout")
+    parser.add_argument("--engine", help="override transcription_engine from config.json")
+    parser.add_argument("--concurrency", type=int, default=4, help="max simultaneous transcriber sessions")
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"))
+    parser.add_argument("--pad-ms", type=int, default=300, help="audio kept around each speech segment")
+    args = parser.parse_args()
+
+    config = ConfigManager(args.config)
+    # stdout may carry the JSONL output
+    setup_logging(config.get("log_level"), config.get("log_format"), stream=sys.stderr)
+    engine = args.engine or config.get("transcription_engine", "deepgram")
+    processor = TextProcessor(config)
+    vad = SileroVAD(
+        threshold=config.get("vad_start_threshold"),
+        stop_threshold=config.get("vad_stop_threshold"),
+        min_speech_ms=config.get("vad_min_speech_ms"),
+        min_silence_ms=config.get("vad_min_silence_ms"),
+        backend=config.get("vad_backend")
+    )
+
+    files = find_audio_files(args.paths)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    audio_s = speech_s = 0.0
+    failures = 0
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            # VAD of later files overlaps with transcription of earlier segments
+            jobs = []
+            for path in files:
+                try:
+                    samples = open_pcm(path)
+                except (OSError, ValueError) as e:
+                    logger.error(f"{path}: {e}")
+                    failures += 1
+                    continue
+                audio_s += len(samples) / SAMPLE_RATE
+                for start, end in find_speech_segments(samples, vad, pad_ms=args.pad_ms):
+                    speech_s += (end - start) / SAMPLE_RATE
+                    future = pool.submit(transcribe_segment, config, engine, processor, samples[start:end])
+                    jobs.append((path, start, end, future))
+
+            for path, start, end, future in jobs:
+                try:
+                    text = future.result()
+                except Exception as e:
+                    logger.error(f"{path} {start / SAMPLE_RATE:.2f}s: {e}")
+                    failures += 1
+                    continue
+                record = {
+                    "file": path,
+                    "start": round(start / SAMPLE_RATE, 3),
+                    "end": round(end / SAMPLE_RATE, 3),
+                    "text": text,
+                }
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall_s = time.perf_counter() - started
+    logger.info(f"{len(files)} files, {audio_s:.1f} s audio ({speech_s:.1f} s speech) in {wall_s:.1f} s: "
+          f"{audio_s / wall_s if wall_s else 0:.1f}x real time, {failures} failures")
+
+
+if __name__ == "__main__":
+    main()
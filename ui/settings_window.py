@@ -52,7 +52,7 @@ class SettingsWindow(QMainWindow):
         self.api_layout = QFormLayout()
 
         self.engine_combo = QComboBox()
-        self.engine_combo.addItems(["deepgram", "whisper_live"])
+        self.engine_combo.addItems(["deepgram", "whisper_live", "local", "hedged"])
         self.engine_combo.setCurrentText(self.config.get("transcription_engine", "deepgram"))
         self.engine_combo.currentTextChanged.connect(self.on_engine_change)
         self.api_layout.addRow("Transcription Engine:", self.engine_combo)
@@ -82,18 +82,26 @@ class SettingsWindow(QMainWindow):
         self.whisper_model_combo.setCurrentText(self.config.get("whisper_model", "small"))
         self.api_layout.addRow(self.whisper_model_label, self.whisper_model_combo)
 
+        self.local_model_label = QLabel("Local Model:")
+        self.local_model_combo = QComboBox()
+        self.local_model_combo.addItems(["tiny", "base", "small", "distil-small.en"])
+        self.local_model_combo.setCurrentText(self.config.get("local_model", "base"))
+        self.api_layout.addRow(self.local_model_label, self.local_model_combo)
+
         widget.setLayout(self.api_layout)
         self.on_engine_change(self.engine_combo.currentText())
         return widget
 
     def on_engine_change(self, engine):
-        is_deepgram = (engine == "deepgram")
+        # Hedging races the engines in hedge_engines: show the settings of each
+        engines = (self.config.get("hedge_engines") or []) if engine == "hedged" else [engine]
+        is_deepgram = ("deepgram" in engines)
         self.deepgram_api_key_label.setVisible(is_deepgram)
         self.api_key_edit.setVisible(is_deepgram)
         self.deepgram_model_label.setVisible(is_deepgram)
         self.model_combo.setVisible(is_deepgram)
 
-        is_whisper = (engine == "whisper_live")
+        is_whisper = ("whisper_live" in engines)
         self.whisper_host_label.setVisible(is_whisper)
         self.whisper_host_edit.setVisible(is_whisper)
         self.whisper_port_label.setVisible(is_whisper)
@@ -101,6 +109,10 @@ class SettingsWindow(QMainWindow):
         self.whisper_model_label.setVisible(is_whisper)
         self.whisper_model_combo.setVisible(is_whisper)
 
+        is_local = ("local" in engines)
+        self.local_model_label.setVisible(is_local)
+        self.local_model_combo.setVisible(is_local)
+
     def create_exclusions_tab(self):
         widget = QWidget()
         layout = QVBoxLayout()
@@ -129,25 +141,28 @@ class SettingsWindow(QMainWindow):
             QMessageBox.warning(self, "Invalid Port", "The port must be a number.")
             return
 
-        self.config.set("language", self.lang_combo.currentText())
-        self.config.set("hotkey", self.hotkey_edit.text())
-
-        self.config.set("transcription_engine", self.engine_combo.currentText())
-        self.config.set("api_key", self.api_key_edit.text())
-        self.config.set("model", self.model_combo.currentText())
-        self.config.set("whisper_host", self.whisper_host_edit.text())
-        self.config.set("whisper_port", port)
-        self.config.set("whisper_model", self.whisper_model_combo.currentText())
-
         exclusions = [l.strip() for l in self.exclusions_edit.toPlainText().split("\n") if l.strip()]
-        self.config.set("exclusions", exclusions)
-        
+
         commands = {}
         for line in self.commands_edit.toPlainText().split("\n"):
             if ":" in line:
                 k, v = line.split(":", 1)
                 commands[k.strip()] = v.strip().replace("\\n", "\n")
-        self.config.set("commands", commands)
-        
-        self.config.save()
+
+        # One notification and one (background) write for the whole form
+        with self.config.batch():
+            self.config.set("language", self.lang_combo.currentText())
+            self.config.set("hotkey", self.hotkey_edit.text())
+
+            self.config.set("transcription_engine", self.engine_combo.currentText())
+            self.config.set("api_key", self.api_key_edit.text())
+            self.config.set("model", self.model_combo.currentText())
+            self.config.set("whisper_host", self.whisper_host_edit.text())
+            self.config.set("whisper_port", port)
+            self.config.set("whisper_model", self.whisper_model_combo.currentText())
+            self.config.set("local_model", self.local_model_combo.currentText())
+
+            self.config.set("exclusions", exclusions)
+            self.config.set("commands", commands)
+
         self.close()
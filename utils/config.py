@@ -1,11 +1,22 @@
+import contextlib
 import json
+import logging
 import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
 
 class ConfigManager:
     DEFAULT_CONFIG = {
         "api_key": "",
         "language": "ru",
         "model": "nova-3",
+        "deepgram_url": "",
+        "deepgram_encoding": "linear16",
+        "opus_bitrate": 24000,
+        "deepgram_endpointing_ms": 0,
+        "deepgram_utterance_end_ms": 1000,
         "hotkey": "option+space",
         "exclusions": [
             "спасибо за просмотр",
@@ -17,13 +28,64 @@ class ConfigManager:
             "новый список": "\n- ",
             "точка": ".",
             "запятая": ","
-        }
+        },
+        "exclusion_max_distance": 1,
+        "paste_threshold": 80,
+        "live_typing": False,
+        "live_typing_interval_ms": 150,
+        "deepgram_prewarm": True,
+        "audio_chunk": 512,
+        "audio_device_rate": 0,
+        "audio_queue_ms": 2000,
+        "audio_buffer_ms": 10000,
+        "pre_roll_ms": 1000,
+        "reconnect_buffer_ms": 10000,
+        "silence_hangover_ms": 300,
+        "keepalive_interval_s": 4.0,
+        "idle_timeout_s": 7.0,
+        "idle_timeout_min_s": 3.0,
+        "idle_timeout_max_s": 15.0,
+        "whisper_frame_ms": 100,
+        "whisper_use_vad": True,
+        "whisper_send_last_n_segments": 10,
+        "local_model": "base",
+        "local_compute_type": "int8",
+        "local_cpu_threads": 0,
+        "local_step_ms": 500,
+        "local_window_s": 15.0,
+        "hedge_engines": ["deepgram", "whisper_live"],
+        "hedge_shadow_s": 2.0,
+        "vad_backend": "onnx",
+        "vad_start_threshold": 0.5,
+        "vad_stop_threshold": 0.35,
+        "vad_min_speech_ms": 64,
+        "vad_min_silence_ms": 256,
+        "vad_finalize": True,
+        "vad_pregate": False,
+        "vad_gate_margin_db": 6.0,
+        "vad_gate_open_db": 15.0,
+        "log_level": "INFO",
+        "log_format": "text",
+        "daemon_socket": "",
+        "daemon_port": 0,
+        "daemon_max_sessions": 8,
+        "daemon_max_pending": 256,
+        "metrics_port": 0,
+        "metrics_dump_path": "",
+        "metrics_dump_interval": 10
     }
 
-    def __init__(self, config_path="config.json"):
+    def __init__(self, config_path="config.json", save_delay=0.5):
         self.config_path = config_path
+        self.save_delay = save_delay
         self.settings = self.load()
 
+        self.lock = threading.RLock()
+        self.subscribers = []
+        self._batch_depth = 0
+        self._batch_changes = {}
+        self._save_timer = None
+
     def load(self):
         if os.path.exists(self.config_path):
             with open(self.config_path, 'r', encoding='utf-8') as f:
@@ -31,12 +93,96 @@ class ConfigManager:
         return self.DEFAULT_CONFIG.copy()
 
     def save(self):
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            json.dump(self.settings, f, indent=4, ensure_ascii=False)
+        """Writes the settings now, atomically (temp file + rename)."""
+        with self.lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            data = json.dumps(self.settings, indent=4, ensure_ascii=False)
+
+        directory = os.path.dirname(os.path.abspath(self.config_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".config-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_path)
+        except OSError as e:
+            logger.error(f"Failed to save config: {e}")
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+    def schedule_save(self):
+        """Saves in the background once changes stop arriving for save_delay seconds."""
+        with self.lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Writes any pending changes immediately (e.g. on exit)."""
+        with self.lock:
+            pending = self._save_timer is not None
+        if pending:
+            self.save()
 
-    def get(self, key):
-        return self.settings.get(key)
+    def get(self, key, default=None):
+        return self.settings.get(key, default)
 
     def set(self, key, value):
-        self.settings[key] = value
-        self.save()
+        with self.lock:
+            if key in self.settings and self.settings[key] == value:
+                return
+            self.settings[key] = value
+            if self._batch_depth:
+                self._batch_changes[key] = value
+                return
+        self._notify({key: value})
+        self.schedule_save()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Groups several set() calls: subscribers are notified once with all
+        changed keys and the file is written once.
+        """
+        with self.lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self._batch_depth -= 1
+                changes = {}
+                if self._batch_depth == 0:
+                    changes, self._batch_changes = self._batch_changes, {}
+            if changes:
+                self._notify(changes)
+                self.schedule_save()
+
+    def subscribe(self, callback, keys=None):
+        """
+        Calls callback(changes) with a dict of changed keys and their new
+        values. When keys is given, only changes touching them are delivered.
+        """
+        with self.lock:
+            self.subscribers.append((callback, set(keys) if keys else None))
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers = [s for s in self.subscribers if s[0] != callback]
+
+    def _notify(self, changes):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback, keys in subscribers:
+            relevant = changes if keys is None else {k: v for k, v in changes.items() if k in keys}
+            if not relevant:
+                continue
+            try:
+                callback(relevant)
+            except Exception as e:
+                logger.error(f"Config subscriber failed: {e}")
@@ -1,6 +1,9 @@
+import logging
 import os
 import requests
 
+logger = logging.getLogger(__name__)
+
 def download_silero_vad():
     model_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
     model_path = os.path.join(model_dir, "silero_vad.onnx")
@@ -8,7 +11,7 @@ def download_silero_vad():
     if os.path.exists(model_path):
         return model_path
     
-    print("[INFO] Silero VAD model not found. Downloading...")
+    logger.info("Silero VAD model not found. Downloading...")
     os.makedirs(model_dir, exist_ok=True)
     
     url = "https://github.com/snakers4/silero-vad/raw/master/src/silero_vad/data/silero_vad.onnx"
@@ -17,7 +20,7 @@ def download_silero_vad():
         with open(model_path, 'wb') as f:
             for chunk in response.iter_content(chunk_size=8192):
                 f.write(chunk)
-        print(f"[INFO] Model downloaded to {model_path}")
+        logger.info(f"Model downloaded to {model_path}")
         return model_path
     else:
         raise Exception(f"Failed to download Silero VAD model. Status code: {response.status_code}")
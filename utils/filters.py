@@ -1,22 +1,156 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_PUNCT_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """Lowercase, drop punctuation, fold ё and collapse whitespace."""
+    text = _PUNCT_RE.sub(" ", text.lower().replace("ё", "е"))
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def _deletes(word, max_distance):
+    """All variants of word with up to max_distance characters deleted."""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+def _edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 as soon as it's known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _char_pattern(ch):
+    # Phrases are normalized, so undo the folding when matching raw text
+    if ch == " ":
+        return r"\s+"
+    if ch == "е":
+        return "[её]"
+    return re.escape(ch)
+
+
+def _trie_pattern(phrases):
+    """
+    One regex alternation shaped like a trie, so matching cost depends on the
+    input rather than on how many phrases there are.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        end = "" in node
+        branches = [_char_pattern(ch) + build(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not end else "(?:" + "|".join(branches) + ")"
+        return body + "?" if end else body
+
+    return build(trie)
+
+
 class TextProcessor:
+    """
+    Filters hallucinated segments and applies voice commands.
+    Exclusions and commands are compiled whenever they change: exclusions
+    into a hash set plus a deletion index for near matches, commands into a
+    single trie-shaped regex that rewrites them anywhere in a segment.
+    """
     def __init__(self, config_manager):
         self.config = config_manager
+        self._compile()
+        self.config.subscribe(
+            lambda changes: self._compile(),
+            keys=("exclusions", "commands", "exclusion_max_distance")
+        )
+
+    def _compile(self):
+        exclusions = self.config.get("exclusions") or []
+        commands = self.config.get("commands") or {}
+        self.max_distance = self.config.get("exclusion_max_distance", 1)
+
+        self.exclusions = {normalize(e) for e in exclusions if normalize(e)}
+        self._delete_index = {}
+        if self.max_distance:
+            for exclusion in self.exclusions:
+                for variant in _deletes(exclusion, self._allowed_distance(exclusion)):
+                    self._delete_index.setdefault(variant, set()).add(exclusion)
+
+        self.commands = {}
+        for keyword, action in commands.items():
+            key = normalize(keyword)
+            if key:
+                self.commands[key] = action
+        if self.commands:
+            self._command_re = re.compile(
+                r"[\s,.;:!?]*(?<!\w)(?P<cmd>" + _trie_pattern(self.commands) + r")(?!\w)[,.;:!?]*(?P<ws>\s*)",
+                re.IGNORECASE
+            )
+        else:
+            self._command_re = None
+
+    def _allowed_distance(self, text):
+        # Short phrases only match exactly, longer ones tolerate more edits
+        return min(self.max_distance, len(text) // 8)
+
+    def is_excluded(self, text):
+        key = normalize(text)
+        if key in self.exclusions:
+            return True
+        if not self._delete_index:
+            return False
+
+        limit = min(self.max_distance, max(1, len(key) // 8))
+        candidates = set()
+        for variant in _deletes(key, limit):
+            candidates |= self._delete_index.get(variant, set())
+        return any(_edit_distance(key, c, self._allowed_distance(c)) <= self._allowed_distance(c)
+                   for c in candidates)
+
+    def apply_commands(self, text):
+        if not self._command_re:
+            return text
+
+        def replace(match):
+            action = self.commands[normalize(match.group("cmd"))]
+            # Keep a separating space unless the action ends the line itself
+            if match.group("ws") and action and not action[-1].isspace():
+                return action + " "
+            return action
+
+        result, count = self._command_re.subn(replace, text)
+        return result.strip(" ") if count else text
 
     def process_segment(self, text, is_final=False):
         """
         Main logic for filtering hallucinations and applying commands.
         """
-        text_lower = text.lower().strip().rstrip(".")
-        
         # 1. Check exclusions
-        exclusions = self.config.get("exclusions")
-        if text_lower in [e.lower() for e in exclusions]:
-            print(f"[DEBUG] Filtered hallucination: {text}")
+        if self.is_excluded(text):
+            logger.debug("Filtered hallucination: %s", text)
             return None
 
-        # 2. Check commands
-        commands = self.config.get("commands")
-        if text_lower in commands:
-            return commands[text_lower]
-
-        return text
+        # 2. Apply commands anywhere in the segment
+        return self.apply_commands(text)
@@ -0,0 +1,133 @@
+import collections
+import contextlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Histogram:
+    """Keeps the most recent samples for percentiles plus lifetime count/sum."""
+    def __init__(self, max_samples=2048):
+        self.samples = collections.deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in quantiles}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in quantiles}
+
+
+class Metrics:
+    """
+    Thread-safe counters and latency histograms (milliseconds).
+    Recording is a dict lookup and a deque append, cheap enough for the
+    audio path; percentiles are only computed when a snapshot is taken.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = collections.defaultdict(float)
+        self.histograms = collections.defaultdict(Histogram)
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def observe(self, name, value_ms):
+        with self.lock:
+            self.histograms[name].observe(value_ms)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {name: (h.count, h.total, h.percentiles()) for name, h in self.histograms.items()}
+        return {
+            "counters": counters,
+            "histograms": {
+                name: {
+                    "count": count,
+                    "mean": total / count if count else 0.0,
+                    "p50": p[0.5],
+                    "p95": p[0.95],
+                    "p99": p[0.99],
+                }
+                for name, (count, total, p) in histograms.items()
+            },
+        }
+
+    def prometheus_text(self):
+        snap = self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE ruttu_{name} counter")
+            lines.append(f"ruttu_{name} {value:g}")
+        for name, h in sorted(snap["histograms"].items()):
+            lines.append(f"# TYPE ruttu_{name} summary")
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append(f'ruttu_{name}{{quantile="{quantile}"}} {h[key]:.3f}')
+            lines.append(f"ruttu_{name}_count {h['count']}")
+            lines.append(f"ruttu_{name}_sum {h['mean'] * h['count']:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry shared by the engine modules
+metrics = Metrics()
+
+
+def start_http_server(port, registry=metrics, host="127.0.0.1"):
+    """Serves /metrics (Prometheus text) and /metrics.json on localhost."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = registry.prometheus_text(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(registry.snapshot(), indent=2), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_json_dump(path, interval=10.0, registry=metrics):
+    """Rewrites path with a JSON snapshot every interval seconds."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(registry.snapshot(), f, indent=2)
+
+    threading.Thread(target=run, daemon=True).start()
+    return stop